@@ -1,287 +1,371 @@
 #!/usr/bin/env python3
 """
-Script to create a static demo version of the Gulf of California Marine Assessment web application.
-This transforms the Flask templates into static HTML files for GitHub Pages deployment.
+Build the static GitHub Pages demo of the Gulf of California Marine Assessment app.
+
+The pages (index.html, about.html, citations.html) are rendered from the
+application's own Jinja templates, and the report data comes from stored
+analysis sessions: data/demo_sessions by default, or any results folder
+such as instance/results. In the demo, index.html replays a stored session
+through the real front-end code in place of the Socket.IO connection. It
+also shows a chart for each sample session and one comparing sites; both
+are generated here with matplotlib.
+
+Builds are incremental. Every output is recorded in demo/.demo-manifest.json
+with a hash of the inputs it was built from (template, session data, static
+file, and this script) and a hash of its content. An output is rebuilt only
+when its inputs changed or the file on disk no longer matches. Outputs that
+are no longer produced (e.g. a removed session's chart) are deleted. Pages
+and charts are rendered in parallel in a process pool.
+
+Usage:
+    python .github/scripts/create_static_demo.py
+    python .github/scripts/create_static_demo.py --sessions instance/results --workers 4
+    python .github/scripts/create_static_demo.py --force
 """
-import os
+
+import argparse
+import hashlib
+import html
+import io
 import json
-import shutil
-from datetime import datetime
-from bs4 import BeautifulSoup
-
-# Configure paths
-DEMO_DIR = "demo"
-TEMPLATES_DIR = "templates"
-STATIC_DIR = "static"
-
-# Ensure demo directory exists
-os.makedirs(DEMO_DIR, exist_ok=True)
-
-def create_static_index():
-    """Convert Flask template to static HTML"""
-    print("Creating static HTML files...")
-    
-    # Read the template
-    with open(os.path.join(TEMPLATES_DIR, "index.html"), "r") as f:
-        content = f.read()
-    
-    # Replace Flask template variables and expressions
-    content = content.replace("{{ url_for('static', filename='", "")
-    content = content.replace("') }}", "")
-    
-    # Parse with BeautifulSoup to make further modifications
-    soup = BeautifulSoup(content, 'html.parser')
-    
-    # Add static demo notice
-    demo_notice = soup.new_tag("div", **{"class": "alert alert-warning", "role": "alert", "style": "margin-top: 10px"})
-    demo_notice.string = "⚠️ This is a static demo of the Gulf of California Marine Assessment tool. For full functionality, please deploy the application using the instructions in the project repository."
-    soup.body.insert(1, demo_notice)
-    
-    # Update Socket.IO connection to use dummy implementation
-    socket_script = soup.find("script", src="https://cdn.socket.io/4.7.2/socket.io.min.js")
-    if socket_script:
-        socket_script.extract()  # Remove the original Socket.IO script
-    
-    # Add dummy data for demonstration purposes
-    dummy_data_script = soup.new_tag("script")
-    dummy_data_script.string = """
-    // Dummy data for static demo
-    const DEMO_DATA = {
-        locations: [
-            {name: 'La Paz', description: 'Capital city of Baja California Sur with diverse marine ecosystems'},
-            {name: 'Bahía de los Ángeles', description: 'UNESCO World Heritage site known for whale sharks and sea lions'},
-            {name: 'Cabo Pulmo', description: 'Marine protected area with recovering coral reef ecosystems'},
-            {name: 'Loreto', description: 'Site of Loreto Bay National Marine Park with high biodiversity'}
-        ],
-        report: {
-            title: 'Marine Ecosystem Assessment Report',
-            date: '2025-06-26',
-            location: 'Cabo Pulmo',
-            metrics: {
-                'Fish Diversity Index': '74/100',
-                'Coral Health': '82/100',
-                'Algal Coverage': '12%',
-                'Water Clarity': '87/100',
-                'Average Temp': '24.6°C'
-            }
-        },
-        analysisSteps: [
-            '09:45:22 | Loading video file: reef_survey_cabo_pulmo_2025.mp4',
-            '09:45:24 | Extracting video frames for analysis...',
-            '09:45:30 | Detecting marine species using ML model v2.3...',
-            '09:45:38 | Analyzing coral coverage: 32% detected',
-            '09:45:42 | Measuring water turbidity and light penetration...',
-            '09:45:48 | Identifying dominant fish species: Parrotfish, Angelfish, Snappers',
-            '09:45:55 | Calculating biodiversity indices...',
-            '09:46:03 | Assessing algal presence: Minimal coverage detected',
-            '09:46:10 | Generating ecological health metrics...',
-            '09:46:15 | Analysis complete! Generating report...'
-        ]
-    };
-
-    // Function to simulate the application behavior for the static demo
-    document.addEventListener('DOMContentLoaded', function() {
-        // Initialize the map
-        if (typeof L !== 'undefined') {
-            const map = L.map('interactive-map').setView([24.0, -110.0], 6);
-            L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
-                attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors',
-                maxZoom: 18
-            }).addTo(map);
-
-            // Add Gulf of California water body
-            L.polygon([
-                [31.6, -114.8], // North
-                [31.0, -114.0], // Northeast
-                [20.5, -105.6], // Southeast
-                [22.8, -109.8]  // Southwest
-            ], {
-                color: '#2196f3',
-                fillColor: '#e3f2fd',
-                fillOpacity: 0.3,
-                weight: 2
-            }).addTo(map).bindPopup('Gulf of California');
-
-            // Add markers for demo locations
-            DEMO_DATA.locations.forEach(loc => {
-                let lat, lng;
-                switch(loc.name) {
-                    case 'La Paz':
-                        lat = 24.1426;
-                        lng = -110.3128;
-                        break;
-                    case 'Bahía de los Ángeles':
-                        lat = 28.9514;
-                        lng = -113.5622;
-                        break;
-                    case 'Cabo Pulmo':
-                        lat = 23.4333;
-                        lng = -109.4167;
-                        break;
-                    case 'Loreto':
-                        lat = 26.0115;
-                        lng = -111.3486;
-                        break;
-                    default:
-                        lat = 24.0;
-                        lng = -110.0;
-                }
-                
-                L.marker([lat, lng])
-                    .addTo(map)
-                    .bindPopup(`<b>${loc.name}</b><br>${loc.description}`);
-            });
-        }
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-        // Set up demo interactions
-        const uploadBtn = document.querySelector('.btn-primary');
-        if (uploadBtn) {
-            uploadBtn.addEventListener('click', function() {
-                simulateAnalysis();
-            });
-        }
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
 
-        // Add demo button
-        const uploadZone = document.getElementById('upload-zone');
-        if (uploadZone) {
-            const demoBtn = document.createElement('button');
-            demoBtn.className = 'btn btn-success mt-3';
-            demoBtn.innerHTML = '<i class="fas fa-play-circle"></i> Run Demo Analysis';
-            demoBtn.addEventListener('click', simulateAnalysis);
-            uploadZone.appendChild(demoBtn);
-        }
-    });
-
-    function simulateAnalysis() {
-        // Show analysis info
-        document.getElementById('analysis-info').style.display = 'block';
-        document.getElementById('video-filename').textContent = 'reef_survey_cabo_pulmo_2025.mp4';
-
-        // Show analysis console
-        document.getElementById('analysis-card').style.display = 'block';
-        const consoleOutput = document.getElementById('console-output');
-        consoleOutput.innerHTML = '';
-
-        // Simulate analysis steps
-        let stepIndex = 0;
-        const interval = setInterval(function() {
-            if (stepIndex < DEMO_DATA.analysisSteps.length) {
-                const message = DEMO_DATA.analysisSteps[stepIndex];
-                
-                const msgDiv = document.createElement('div');
-                msgDiv.className = 'console-message';
-                msgDiv.innerHTML = message;
-                
-                consoleOutput.appendChild(msgDiv);
-                consoleOutput.scrollTop = consoleOutput.scrollHeight;
-                
-                stepIndex++;
-            } else {
-                clearInterval(interval);
-                simulateReportGeneration();
-            }
-        }, 1000);
-    }
-
-    function simulateReportGeneration() {
-        // Show report card
-        setTimeout(function() {
-            document.getElementById('report-card').style.display = 'block';
-            
-            // Generate report content
-            const reportContent = document.getElementById('report-content');
-            reportContent.innerHTML = `
-                <h3>${DEMO_DATA.report.title}</h3>
-                <p class="text-muted">Generated on ${DEMO_DATA.report.date} for ${DEMO_DATA.report.location}</p>
-                
-                <div class="row mt-4">
-                    <div class="col-md-6">
-                        <div class="card mb-4">
-                            <div class="card-header">
-                                <h5>Ecosystem Health Metrics</h5>
-                            </div>
-                            <div class="card-body">
-                                <table class="table table-striped">
-                                    <tbody>
-                                        ${Object.entries(DEMO_DATA.report.metrics).map(([key, value]) => 
-                                            `<tr><td>${key}</td><td>${value}</td></tr>`
-                                        ).join('')}
-                                    </tbody>
-                                </table>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="col-md-6">
-                        <div class="card mb-4">
-                            <div class="card-header">
-                                <h5>Biodiversity Distribution</h5>
-                            </div>
-                            <div class="card-body">
-                                <div id="biodiversity-chart" style="height: 250px;">
-                                    <img src="static/plots/demo-biodiversity.png" class="img-fluid" alt="Biodiversity Chart">
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="card mb-4">
-                    <div class="card-header">
-                        <h5>Assessment Summary</h5>
-                    </div>
-                    <div class="card-body">
-                        <p>The marine ecosystem at ${DEMO_DATA.report.location} demonstrates a good overall health status with a Fish Diversity Index of ${DEMO_DATA.report.metrics['Fish Diversity Index']}. Coral health is excellent at ${DEMO_DATA.report.metrics['Coral Health']}, indicating minimal bleaching or disease.</p>
-                        <p>Water quality measurements show high clarity (${DEMO_DATA.report.metrics['Water Clarity']}) and optimal temperature (${DEMO_DATA.report.metrics['Average Temp']}) for native species. Algal coverage remains low at ${DEMO_DATA.report.metrics['Algal Coverage']}.</p>
-                        <p>Based on these metrics, this site maintains a healthy balance of species and habitat conditions. Continued monitoring is recommended to track seasonal variations and potential climate change impacts.</p>
-                    </div>
-                </div>
-            `;
-            
-            // Enable chat functionality
-            document.getElementById('chat-input').disabled = false;
-            document.getElementById('send-chat').disabled = false;
-            
-            // Add a welcome message
-            const chatMessages = document.getElementById('chat-messages');
-            const botMsg = document.createElement('div');
-            botMsg.className = 'bot-message';
-            botMsg.innerHTML = `
-                <i class="fas fa-robot"></i>
-                <div class="message-content">
-                    I've analyzed the marine ecosystem at ${DEMO_DATA.report.location}. The location shows healthy coral and fish populations. Would you like to know more about any specific aspect of the assessment?
+import assets  # noqa: E402
+from counters import UsageCounters  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+from simulation import ANALYSIS_STAGES  # noqa: E402
+
+TEMPLATES_DIR = os.path.join(REPO_ROOT, 'templates')
+STATIC_DIR = os.path.join(REPO_ROOT, 'static')
+DEMO_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static_demo.js')
+MANIFEST_NAME = '.demo-manifest.json'
+
+# Runtime output folders and pre-compressed copies are not part of the demo
+STATIC_SKIP_DIRS = {'reports', 'plots', '__pycache__'}
+STATIC_SKIP_SUFFIXES = ('.gz', '.br')
+
+PAGE_ENDPOINTS = {'index': 'index.html', 'about': 'about.html', 'citations': 'citations.html'}
+SOCKET_IO_TAG = '<script src="https://cdn.socket.io/4.7.2/socket.io.min.js"></script>'
+STEP_MS = 700
+
+with open(os.path.abspath(__file__), 'rb') as _f:
+    BUILDER_HASH = hashlib.sha256(_f.read()).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Rendering (runs in worker processes)
+# ----------------------------------------------------------------------
+_environment = None
+
+
+def _demo_url_for(endpoint, **values):
+    if endpoint == 'static':
+        return f"static/{values['filename']}"
+    if endpoint == 'serve_asset':
+        return f"static/dist/{values['filename']}"
+    return PAGE_ENDPOINTS[endpoint]
+
+
+def _jinja():
+    global _environment
+    if _environment is None:
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        _environment = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape(['html']))
+        _environment.globals['url_for'] = _demo_url_for
+    return _environment
+
+
+def _insert_after_body(page, markup):
+    start = page.index('<body')
+    end = page.index('>', start) + 1
+    return page[:end] + '\n' + markup + page[end:]
+
+
+def _gallery(sessions):
+    cards = []
+    for results in sessions:
+        session_id = html.escape(results['session_id'])
+        location = html.escape(results.get('location', 'Unknown site'))
+        cards.append(f"""        <div class="col-sm-6 col-lg-4">
+            <div class="card h-100">
+                <img src="static/plots/demo_{session_id}.png" class="card-img-top" alt="Reef health metrics at {location}">
+                <div class="card-body">
+                    <h6 class="card-title mb-1">{location}</h6>
+                    <p class="card-text small text-muted">{html.escape(results.get('date', ''))} &middot; FHI {results.get('fish_health_index', 0):.2f}</p>
+                    <button class="btn btn-sm btn-primary demo-replay" data-session-id="{session_id}">Replay analysis</button>
                 </div>
-                <div class="message-time">Just now</div>
-            `;
-            chatMessages.appendChild(botMsg);
-        }, 1500);
-    }
+            </div>
+        </div>""")
+    return f"""<div class="container mt-3" id="demo-sessions">
+    <div class="alert alert-warning" role="alert">&#9888;&#65039; This is a static demo of the Gulf of California Marine Assessment tool, built from {len(sessions)} stored sample surveys. Replay one below to see its analysis and report. For full functionality, deploy the application using the instructions in the project repository.</div>
+    <div class="row g-3">
+{chr(10).join(cards)}
+    </div>
+    <img src="static/plots/demo_sites.png" class="img-fluid mt-3" alt="Fish Health Index by site across the sample surveys">
+</div>
+"""
+
+
+def render_page(template_name, context):
+    """Render a template to bytes; the index page also gets the demo gallery and session replay."""
+    environment = _jinja()
+    context = dict(context)
+    asset_urls = context.pop('asset_urls')
+    environment.globals['asset_urls'] = lambda bundle: asset_urls[bundle]
+    page = environment.get_template(template_name).render(**context)
+    if template_name == 'index.html':
+        sessions = context['demo_sessions']
+        page = page.replace(SOCKET_IO_TAG, '')
+        page = _insert_after_body(page, _gallery(sessions))
+        demo = {
+            'sessions': {results['session_id']: results for results in sessions},
+            'stages': context['demo_stages'],
+            'stepMs': STEP_MS,
+        }
+        # Keep '</script>' in session data from ending the script element
+        data = json.dumps(demo).replace('</', '<\\/')
+        page = page.replace('</body>', f'    <script>window.DEMO = {data};</script>\n'
+                                      f'    <script src="static_demo.js"></script>\n</body>')
+    return page.encode('utf-8')
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _png(figure):
+    buffer = io.BytesIO()
+    # Fixed metadata keeps the bytes stable across runs
+    figure.savefig(buffer, format='png', dpi=100, metadata={'Software': None})
+    return buffer.getvalue()
+
+
+def render_session_chart(results):
+    """Bar chart of a session's metrics, as in the PDF report."""
+    plt = _pyplot()
+    figure = plt.figure(figsize=(7, 4))
+    metrics = ['Fish Density\n(fish/ha÷10)', 'Invertebrate\nCover (%)', 'Coral\nBleaching (%)', 'Algal Bloom\nRisk (%)']
+    values = [results['fish_density'] / 10, results['invertebrate_cover'],
+              results['coral_bleaching'], results.get('algal_bloom_score', 0.15) * 100]
+    plt.bar(metrics, values, color=['#3498db', '#2ecc71', '#e74c3c', '#f39c12'])
+    plt.ylabel('Value')
+    plt.title(f"Reef Health Metrics - {results.get('location', '')}")
+    plt.tight_layout()
+    try:
+        return _png(figure)
+    finally:
+        plt.close(figure)
+
+
+def render_site_chart(site_fhi):
+    """Bar chart of the mean Fish Health Index per site."""
+    plt = _pyplot()
+    names = sorted(site_fhi)
+    means = [sum(site_fhi[name]) / len(site_fhi[name]) for name in names]
+    figure = plt.figure(figsize=(8, 3.5))
+    plt.bar(names, means, color='#0277bd')
+    plt.ylim(0, 1)
+    plt.ylabel('Mean Fish Health Index')
+    plt.title('Fish Health Index by Site (sample surveys)')
+    plt.tight_layout()
+    try:
+        return _png(figure)
+    finally:
+        plt.close(figure)
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# ----------------------------------------------------------------------
+# Planning and incremental build (main process)
+# ----------------------------------------------------------------------
+class Task:
+    """
+    One demo output.
+
+    Args:
+        path (str): Output path relative to the demo folder
+        func (callable): Produces the output's bytes from `args`
+        args (tuple): JSON-serialisable arguments, hashed as the task's inputs
+        inputs (list): Files whose contents are also inputs
+        parallel (bool): Run in the process pool (False for plain copies)
+    """
+
+    def __init__(self, path, func, args=(), inputs=(), parallel=True):
+        self.path = path
+        self.func = func
+        self.args = args
+        self.parallel = parallel
+        digest = hashlib.sha256(BUILDER_HASH.encode())
+        digest.update(func.__name__.encode())
+        digest.update(json.dumps(args, sort_keys=True, default=str).encode('utf-8'))
+        for input_path in inputs:
+            digest.update(read_file(input_path))
+        self.digest = digest.hexdigest()
+
+
+def _asset_urls():
+    manifest = assets.AssetManifest.load(os.path.join(STATIC_DIR, 'dist'))
+    urls = {}
+    for bundle, sources in assets.BUNDLES.items():
+        built = manifest.built_file(bundle)
+        urls[bundle] = [_demo_url_for('serve_asset', filename=built)] if built else \
+            [_demo_url_for('static', filename=source) for source in sources]
+    return urls
+
+
+def load_sessions(folder):
+    """Stored sessions with complete results, newest first."""
+    sessions = [results for results in SessionStore(folder).iter_results() if 'fish_health_index' in results]
+    sessions.sort(key=lambda results: (results.get('date', ''), results['session_id']), reverse=True)
+    return sessions
+
+
+def load_citations(usage_file=None):
+    with open(os.path.join(REPO_ROOT, 'data', 'citations.json'), encoding='utf-8') as f:
+        catalogue = json.load(f)
+    usage = UsageCounters(catalogue, path=usage_file)
+    return {group: [dict(entry) for entry in usage.sorted_view(group)] for group in catalogue}
+
+
+def plan(sessions, citations):
+    """Return every output of the demo as a Task."""
+    asset_urls = _asset_urls()
+    tasks = [
+        Task('index.html', render_page, ('index.html', {
+            'asset_urls': asset_urls,
+            'demo_sessions': sessions,
+            'demo_stages': [message for _, message, _ in ANALYSIS_STAGES],
+        }), inputs=[os.path.join(TEMPLATES_DIR, 'index.html')]),
+        Task('about.html', render_page, ('about.html', {'asset_urls': asset_urls}),
+             inputs=[os.path.join(TEMPLATES_DIR, 'about.html')]),
+        Task('citations.html', render_page, ('citations.html', {'asset_urls': asset_urls, **citations}),
+             inputs=[os.path.join(TEMPLATES_DIR, 'citations.html')]),
+    ]
+    site_fhi = {}
+    for results in sessions:
+        tasks.append(Task(f"static/plots/demo_{results['session_id']}.png", render_session_chart, (results,)))
+        site_fhi.setdefault(results.get('location', 'Unknown'), []).append(results['fish_health_index'])
+    tasks.append(Task('static/plots/demo_sites.png', render_site_chart, (site_fhi,)))
+
+    tasks.append(Task('static_demo.js', read_file, (DEMO_SCRIPT,), inputs=[DEMO_SCRIPT], parallel=False))
+    for folder, dirs, files in os.walk(STATIC_DIR):
+        dirs[:] = sorted(name for name in dirs if name not in STATIC_SKIP_DIRS)
+        for name in sorted(files):
+            if name.endswith(STATIC_SKIP_SUFFIXES):
+                continue
+            source = os.path.join(folder, name)
+            relative = os.path.relpath(source, REPO_ROOT).replace(os.sep, '/')
+            tasks.append(Task(relative, read_file, (source,), inputs=[source], parallel=False))
+    return tasks
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _content_hash(path):
+    try:
+        return hashlib.sha256(read_file(path)).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def build(tasks, output, workers=None, force=False):
+    """
+    Produce the outputs whose inputs changed and update the manifest.
+
+    Returns:
+        dict: Counts of built, skipped and removed outputs
     """
-    
-    # Add the dummy data script to the document
-    soup.body.append(dummy_data_script)
-    
-    # Write the static HTML file
-    with open(os.path.join(DEMO_DIR, "index.html"), "w") as f:
-        f.write(str(soup))
-
-def create_demo_plots():
-    """Create placeholder plot images for the demo"""
-    print("Creating demo plot images...")
-    
-    # Create plots directory if it doesn't exist
-    plots_dir = os.path.join(DEMO_DIR, "static", "plots")
-    os.makedirs(plots_dir, exist_ok=True)
-    
-    # If there's an example plot, use it, otherwise create a placeholder text file
-    example_plot = os.path.join(STATIC_DIR, "plots", "demo-biodiversity.png")
-    if os.path.exists(example_plot):
-        shutil.copy(example_plot, os.path.join(plots_dir, "demo-biodiversity.png"))
+    manifest_path = os.path.join(output, MANIFEST_NAME)
+    try:
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    except (FileNotFoundError, ValueError):
+        previous = {}
+
+    manifest = {}
+    pending = []
+    for task in tasks:
+        entry = previous.get(task.path)
+        if (not force and entry is not None and entry['inputs'] == task.digest
+                and _content_hash(os.path.join(output, task.path)) == entry['output']):
+            manifest[task.path] = entry
+        else:
+            pending.append(task)
+
+    def record(task, data):
+        _write_atomic(os.path.join(output, task.path), data)
+        manifest[task.path] = {'inputs': task.digest, 'output': hashlib.sha256(data).hexdigest()}
+
+    parallel = [task for task in pending if task.parallel]
+    if parallel:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(task.func, *task.args): task for task in parallel}
+            # Copies run here while the pool renders
+            for task in pending:
+                if not task.parallel:
+                    record(task, task.func(*task.args))
+            for future in as_completed(futures):
+                record(futures[future], future.result())
     else:
-        # Create a placeholder file
-        with open(os.path.join(plots_dir, "demo-biodiversity.png"), "w") as f:
-            f.write("This is a placeholder for a biodiversity chart image")
-
-if __name__ == "__main__":
-    create_static_index()
-    create_demo_plots()
-    print("Static demo created successfully in the 'demo' directory")
+        for task in pending:
+            record(task, task.func(*task.args))
+
+    removed = 0
+    for path in set(previous) - set(manifest):
+        try:
+            os.unlink(os.path.join(output, path))
+            removed += 1
+        except FileNotFoundError:
+            pass
+
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return {'built': len(pending), 'skipped': len(tasks) - len(pending), 'removed': removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the static GitHub Pages demo from stored sample sessions.")
+    parser.add_argument('--sessions', default=os.path.join(REPO_ROOT, 'data', 'demo_sessions'),
+                        help="Folder of stored session results (one JSON file per session)")
+    parser.add_argument('--citation-usage', help="Citation usage counts file (DATA_FOLDER/citation_usage.json)")
+    parser.add_argument('--output', default='demo', help="Demo folder (default: demo)")
+    parser.add_argument('--workers', type=int, help="Render processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="Rebuild every output")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sessions = load_sessions(args.sessions)
+    if not sessions:
+        sys.exit(f"No stored sessions with results in {args.sessions}")
+    tasks = plan(sessions, load_citations(args.citation_usage))
+    counts = build(tasks, args.output, workers=args.workers, force=args.force)
+    print(f"Static demo in '{args.output}' from {len(sessions)} sessions: {counts['built']} outputs built, "
+          f"{counts['skipped']} unchanged, {counts['removed']} removed ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+// Static demo: stands in for the Socket.IO connection and replays stored sample sessions
+// window.DEMO ({sessions, stages, stepMs}) is written into the page by create_static_demo.py
+
+(function() {
+    const handlers = {};
+
+    // The app calls io() on startup; hand it a socket that only dispatches replayed events
+    window.io = function() {
+        return {
+            on(event, handler) {
+                (handlers[event] = handlers[event] || []).push(handler);
+            },
+            emit() {}
+        };
+    };
+
+    function dispatch(event, data) {
+        (handlers[event] || []).forEach(handler => handler(data));
+    }
+
+    function replaySession(sessionId) {
+        const results = window.DEMO.sessions[sessionId];
+        const app = window.reefApp;
+        if (!results || !app) {
+            return;
+        }
+        app.currentSessionId = sessionId;
+        document.getElementById('video-filename').textContent = results.video_filename;
+        document.getElementById('analysis-info').style.display = 'block';
+        document.getElementById('algal-bloom-alert').style.display =
+            results.algal_bloom_level === 'High' ? 'block' : 'none';
+        app.clearConsole();
+        app.showAnalysisConsole();
+
+        const stages = window.DEMO.stages;
+        stages.forEach((message, index) => {
+            setTimeout(() => {
+                dispatch('analysis_step', {
+                    session_id: sessionId,
+                    message: message,
+                    timestamp: new Date().toLocaleTimeString()
+                });
+            }, (index + 1) * window.DEMO.stepMs);
+        });
+        setTimeout(() => {
+            dispatch('analysis_complete', { session_id: sessionId, results: results });
+        }, (stages.length + 1) * window.DEMO.stepMs);
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        // Registered after the app's own listener, so window.reefApp exists by now
+        dispatch('connect');
+        document.querySelectorAll('.demo-replay').forEach(button => {
+            button.addEventListener('click', () => replaySession(button.dataset.sessionId));
+        });
+    });
+})();
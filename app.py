@@ -12,6 +12,8 @@ Purpose: Educational/Demo PoC for marine ecosystem assessment
 """
 
 import os
+import sys
+import math
 import random
 import time
 import datetime
@@ -19,75 +21,60 @@ import json
 import io
 import base64
 import tempfile
+import zipfile
 from flask import Flask, render_template, request, jsonify, url_for, send_file
 from flask_socketio import SocketIO, emit
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import numpy as np
 import uuid
-import openai
 from dotenv import load_dotenv
+# ReportLab, matplotlib and openai are imported lazily (see load_pyplot,
+# load_openai and generate_pdf) so the server binds and answers /healthz
+# quickly after a cold start
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Citation and Impact Tracking Framework
-citations_data = {
-    'papers': [
-        {
-            'citation': 'Favoretto, F., Carmona, Y., López-Sagástegui, C., et al. (2024). Eficacia de las áreas marinas protegidas de uso multiple en el Golfo de California: sostener a los arrecifes en estado degradado no contribuye al bienestar social.',
-            'used': 0
-        },
-        {
-            'citation': 'Favoretto, F., López-Sagástegui, C., León-Solórzano, E., & Aburto-Oropeza, O. (2024). A scalable and normalized reef status index for assessing fish trophic structure reveals conservation gaps. Ecological Indicators, 166, 112515.',
-            'used': 0
-        },
-        {
-            'citation': 'Favoretto, F., Sánchez, C., & Aburto-Oropeza, O. (2022). Warming and marine heatwaves tropicalize rocky reefs communities in the Gulf of California. Progress in Oceanography, 206, 102838.',
-            'used': 0
-        },
-        {
-            'citation': 'Favoretto, F., Mascareñas-Osorio, I., León-Deniz, L., González-Salas, C., et al. (2020). Being isolated and protected is better than just being isolated: a case study from the Alacranes Reef, Mexico. Frontiers in Marine Science, 7, 583056c.',
-            'used': 0
-        },
-        {
-            'citation': 'Ulate, K., Alcoverro, T., Arthur, R., Aburto-Oropeza, O., Sánchez, C., et al. (2018). Conventional MPAs are not as effective as community co-managed areas in conserving top-down control in the Gulf of California. Biological Conservation, 228, 100-109.',
-            'used': 0
-        }
-    ],
-    'databases': [
-        {
-            'citation': 'Long term ecological monitoring database 1998-2025, Gulf of California Marine Program.',
-            'used': 0
-        }
-    ]
-}
+# Citation and Impact Tracking Framework (data/citations.json). 'used' is the starting
+# count; live counts are kept by citation_usage (see counters.py)
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'citations.json'), encoding='utf-8') as f:
+    citations_data = json.load(f)
 
-# Configure OpenAI client
-openai.api_key = os.getenv('OPENAI_API_KEY')
+# OpenAI client is configured on first use by load_openai()
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
 import logging
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file, session
+from flask import Flask, render_template, request, jsonify, send_file, session, g, Response, stream_with_context
+from functools import wraps
 from flask_socketio import SocketIO
 import json
 import time
 from threading import Thread
+from loop_monitor import LoopLagMonitor, enable_blocking_detection
+import profiling
+from logging_setup import configure_logging, parse_sample_rates, current_session_id
+from session_store import SessionStore
+from storage import UploadStorage
+from sites import SiteRegistry, read_video_gps
+from map_index import SurveyPointIndex
+from rollups import SiteRollups, ALL_PERIODS
+from campaigns import Campaign, zip_items, directory_items
+import export
+from simulation import ANALYSIS_STAGES, SimulationClock, load_stage_profile
+from counters import UsageCounters
+from chat_intents import ChatContext, build_router
+import assets
 
-# Configure logging for verbose output as per user rules
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('reef_assessment.log'),
-        logging.StreamHandler()
-    ]
+# Configure logging for verbose output as per user rules. Records are queued and
+# written by a background OS thread so request threads never block on disk.
+configure_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    log_file=os.getenv('LOG_FILE', 'reef_assessment.log'),
+    json_format=os.getenv('LOG_FORMAT', 'text') == 'json',
+    max_bytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+    backup_count=int(os.getenv('LOG_BACKUP_COUNT', '5')),
+    rotate_when=os.getenv('LOG_ROTATE_WHEN', 'midnight'),
+    sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', '')),
+    default_sample_rate=int(os.getenv('LOG_SAMPLE_DEFAULT', '1'))
 )
 logger = logging.getLogger(__name__)
 
@@ -97,6 +84,54 @@ app.config['SECRET_KEY'] = 'rapidreefassessment'
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['REPORTS_FOLDER'] = 'static/reports'
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024  # 500MB max upload size
+# Event-loop lag monitoring (see loop_monitor.py)
+app.config['LOOP_MONITOR_ENABLED'] = os.getenv('LOOP_MONITOR_ENABLED', '1') == '1'
+app.config['LOOP_MONITOR_INTERVAL'] = float(os.getenv('LOOP_MONITOR_INTERVAL', '0.1'))  # seconds
+app.config['LOOP_MONITOR_STALL_THRESHOLD'] = float(os.getenv('LOOP_MONITOR_STALL_THRESHOLD', '0.5'))  # seconds
+# Debug only: interrupt code that blocks the hub longer than the resolution
+app.config['EVENTLET_DEBUG_BLOCKING'] = os.getenv('EVENTLET_DEBUG_BLOCKING', '0') == '1'
+app.config['EVENTLET_DEBUG_BLOCKING_RESOLUTION'] = float(os.getenv('EVENTLET_DEBUG_BLOCKING_RESOLUTION', '1.0'))
+# Admin token guarding diagnostics such as on-demand request profiling
+app.config['ADMIN_TOKEN'] = os.getenv('ADMIN_TOKEN')
+app.config['PROFILE_FOLDER'] = os.getenv('PROFILE_FOLDER', 'profiles')
+app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', '50'))
+app.config['PROFILE_MAX_BYTES'] = int(os.getenv('PROFILE_MAX_BYTES', str(50 * 1024 * 1024)))
+app.config['PROFILE_SAMPLE_INTERVAL'] = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))  # seconds
+# Optionally import the heavy PDF/chatbot dependencies shortly after the server binds
+app.config['WARMUP_ON_START'] = os.getenv('WARMUP_ON_START', '0') == '1'
+app.config['WARMUP_DELAY'] = float(os.getenv('WARMUP_DELAY', '2.0'))  # seconds after startup
+# Durable application data (analysis results etc.); point this at a persistent disk
+app.config['DATA_FOLDER'] = os.getenv('DATA_FOLDER', 'instance')
+app.config['RESULTS_FOLDER'] = os.path.join(app.config['DATA_FOLDER'], 'results')
+app.config['ROLLUPS_FILE'] = os.path.join(app.config['DATA_FOLDER'], 'rollups.json')
+app.config['ROLLUPS_FLUSH_INTERVAL'] = float(os.getenv('ROLLUPS_FLUSH_INTERVAL', '60'))  # seconds
+# Citation usage counts, persisted in batches
+app.config['CITATION_USAGE_FILE'] = os.path.join(app.config['DATA_FOLDER'], 'citation_usage.json')
+app.config['CITATION_FLUSH_INTERVAL'] = float(os.getenv('CITATION_FLUSH_INTERVAL', '30'))  # seconds
+# Pipeline checkpoints of in-progress analyses, resumed on startup
+app.config['CHECKPOINT_FOLDER'] = os.path.join(app.config['DATA_FOLDER'], 'checkpoints')
+app.config['RESUME_ON_START'] = os.getenv('RESUME_ON_START', '1') == '1'
+# Upload storage lifecycle (see storage.py)
+app.config['UPLOAD_QUOTA_BYTES'] = int(float(os.getenv('UPLOAD_QUOTA_MB', '900')) * 1024 * 1024)
+app.config['UPLOAD_EVICTION_POLICY'] = os.getenv('UPLOAD_EVICTION_POLICY', 'lru')  # 'lru' or 'age'
+app.config['UPLOAD_MAX_AGE_HOURS'] = float(os.getenv('UPLOAD_MAX_AGE_HOURS', '0'))  # 0 keeps videos until space is needed
+app.config['UPLOAD_KEEP_PROXY'] = os.getenv('UPLOAD_KEEP_PROXY', '0') == '1'
+app.config['UPLOAD_PROXY_HEIGHT'] = int(os.getenv('UPLOAD_PROXY_HEIGHT', '360'))
+# Monitored site registry (see sites.py) and how far GPS may be from a site to match it
+app.config['SITES_FILE'] = os.getenv('SITES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sites.json'))
+app.config['SITE_MATCH_RADIUS_KM'] = float(os.getenv('SITE_MATCH_RADIUS_KM', '25'))
+# Simulated pipeline timing (see simulation.py): stage profile and wall-clock seconds per simulated second
+app.config['SIM_STAGE_PROFILE'] = os.getenv('SIM_STAGE_PROFILE', 'realistic')
+app.config['SIM_TIME_SCALE'] = float(os.getenv('SIM_TIME_SCALE', '1.0'))
+# Batch ingest: videos analysed concurrently per campaign, and the only directory
+# server-side imports may read from (unset disables directory imports)
+app.config['BATCH_WORKERS'] = int(os.getenv('BATCH_WORKERS', '2'))
+app.config['BATCH_IMPORT_ROOT'] = os.getenv('BATCH_IMPORT_ROOT')
+# Server-side map clustering (see map_index.py)
+app.config['MAP_MAX_ZOOM'] = int(os.getenv('MAP_MAX_ZOOM', '14'))
+app.config['MAP_TILE_CACHE_SIZE'] = int(os.getenv('MAP_TILE_CACHE_SIZE', '4096'))
+# Built asset bundles (see assets.py and scripts/build_assets.py)
+app.config['ASSET_FOLDER'] = os.getenv('ASSET_FOLDER', os.path.join(app.static_folder, 'dist'))
 
 # Configure SocketIO with simplified settings focused on stability
 # Lowering ping_interval and using threading for background tasks
@@ -119,15 +154,94 @@ os.makedirs('static/plots', exist_ok=True)
 # Global storage for session data (in production, use proper database)
 analysis_sessions = {}
 upload_history = []
+campaigns = {}
+
+# Completed results are also persisted so they survive restarts and raw videos can be evicted
+session_store = SessionStore(app.config['RESULTS_FOLDER'])
+# In-progress analyses checkpoint their pipeline state here (same one-file-per-session layout)
+checkpoint_store = SessionStore(app.config['CHECKPOINT_FOLDER'])
+upload_storage = UploadStorage(
+    app.config['UPLOAD_FOLDER'],
+    quota_bytes=app.config['UPLOAD_QUOTA_BYTES'],
+    policy=app.config['UPLOAD_EVICTION_POLICY'],
+    max_age_seconds=app.config['UPLOAD_MAX_AGE_HOURS'] * 3600 or None,
+    is_persisted=session_store.exists,
+    keep_proxy=app.config['UPLOAD_KEEP_PROXY'],
+    proxy_height=app.config['UPLOAD_PROXY_HEIGHT']
+)
+
+# Thread-safe citation usage counters with a pre-sorted view for the citations page
+citation_usage = UsageCounters(
+    citations_data,
+    path=app.config['CITATION_USAGE_FILE'],
+    flush_interval=app.config['CITATION_FLUSH_INTERVAL']
+)
+citation_usage.start()
+
+# Fingerprinted asset bundles; without a build, templates link the source files
+asset_manifest = assets.AssetManifest.load(app.config['ASSET_FOLDER'])
+if not asset_manifest:
+    logger.info("No asset build found; serving individual static files (run scripts/build_assets.py)")
+
+@app.template_global()
+def asset_urls(bundle):
+    """Return the URLs a template should load for an asset bundle."""
+    built = asset_manifest.built_file(bundle)
+    if built is not None:
+        return [url_for('serve_asset', filename=built)]
+    return [url_for('static', filename=source) for source in assets.BUNDLES[bundle]]
+
+# Chatbot intents answered locally before falling back to OpenAI
+chat_router = build_router()
+
+# Clock and stage durations driving the simulated analysis pipeline
+simulation_clock = SimulationClock(app.config['SIM_TIME_SCALE'])
+stage_durations = load_stage_profile(app.config['SIM_STAGE_PROFILE'])
+
+# Survey point index for the map; built from stored sessions on first use
+survey_index = None
+
+def get_survey_index():
+    """Return the survey point index, loading stored session coordinates on first use."""
+    global survey_index
+    if survey_index is None:
+        started = time.perf_counter()
+        index = SurveyPointIndex(
+            max_zoom=app.config['MAP_MAX_ZOOM'],
+            cache_tiles=app.config['MAP_TILE_CACHE_SIZE']
+        )
+        for results in session_store.iter_results():
+            index.add_results(results)
+        survey_index = index
+        logger.info(f"Survey point index built with {len(index)} points in {time.perf_counter() - started:.2f}s")
+    return survey_index
+
+# Per-site/per-period aggregates; loaded (and caught up with the store) on first use
+site_rollups = None
+
+def get_site_rollups():
+    """Return the site rollups, loading the snapshot and any sessions it is missing on first use."""
+    global site_rollups
+    if site_rollups is None:
+        started = time.perf_counter()
+        site_rollups = SiteRollups.load(
+            app.config['ROLLUPS_FILE'], session_store, flush_interval=app.config['ROLLUPS_FLUSH_INTERVAL']
+        )
+        site_rollups.start()
+        logger.info(f"Site rollups loaded with {len(site_rollups)} sessions in {time.perf_counter() - started:.2f}s")
+    return site_rollups
 
-# Gulf of California locations for random selection
-GULF_LOCATIONS = [
-    {"name": "La Paz", "lat": 24.1426, "lng": -110.3128},
-    {"name": "Bahía de los Ángeles", "lat": 28.9514, "lng": -113.5622},
-    {"name": "Cabo Pulmo", "lat": 23.4333, "lng": -109.4167},
-    {"name": "Loreto", "lat": 26.0115, "lng": -111.3486},
-    {"name": "Corredor", "lat": 24.8000, "lng": -110.2500} # Added the Corredor location
-]
+def get_session_results(session_id):
+    """Return results for a session from memory, falling back to the persisted store."""
+    if session_id in analysis_sessions:
+        return analysis_sessions[session_id]
+    results = session_store.load(session_id) if session_id else None
+    if results is not None:
+        analysis_sessions[session_id] = results
+    return results
+
+# Gulf of California monitoring sites, loaded from the site registry data file
+site_registry = SiteRegistry.from_file(app.config['SITES_FILE'])
 
 # Baseline data for comparisons (simulated)
 CABO_PULMO_BASELINE = {
@@ -138,126 +252,315 @@ CABO_PULMO_BASELINE = {
     "invasive_species": 0
 }
 
+def load_pyplot():
+    """Import matplotlib with the non-interactive Agg backend on first use."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def load_openai():
+    """Import and configure the OpenAI client on first use."""
+    import openai
+    if openai.api_key is None:
+        openai.api_key = OPENAI_API_KEY
+    return openai
+
+def warm_up():
+    """Import heavy dependencies and build indexes ahead of the first requests that need them."""
+    started = time.perf_counter()
+    import reportlab.platypus  # noqa: F401
+    load_pyplot()
+    load_openai()
+    get_survey_index()
+    get_site_rollups()
+    logger.info(f"Warm-up complete: heavy dependencies imported in {time.perf_counter() - started:.2f}s")
+
+def _monitored_handlers():
+    """Map handler names to functions so loop stalls can be attributed."""
+    handlers = dict(app.view_functions)
+    handlers['analysis:simulate_video_analysis'] = simulate_video_analysis
+    handlers['socketio:connect'] = handle_connect
+    handlers['socketio:disconnect'] = handle_disconnect
+    return handlers
+
+loop_monitor = LoopLagMonitor(
+    interval=app.config['LOOP_MONITOR_INTERVAL'],
+    stall_threshold=app.config['LOOP_MONITOR_STALL_THRESHOLD'],
+    handler_resolver=_monitored_handlers
+)
+
+profile_store = profiling.ProfileStore(
+    app.config['PROFILE_FOLDER'],
+    max_files=app.config['PROFILE_MAX_FILES'],
+    max_bytes=app.config['PROFILE_MAX_BYTES']
+)
+
+def _supplied_admin_token():
+    return request.headers.get('X-Admin-Token') or request.args.get('admin_token')
+
+def require_admin(view):
+    """Restrict a route to callers presenting the configured ADMIN_TOKEN."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not profiling.admin_token_valid(_supplied_admin_token(), app.config['ADMIN_TOKEN']):
+            return jsonify({'error': 'Admin token required'}), 403
+        return view(*args, **kwargs)
+    return wrapped
+
+@app.before_request
+def bind_log_context():
+    """Record request start and session so log records carry latency and session_id."""
+    g.request_started = time.perf_counter()
+    session_id = (request.view_args or {}).get('session_id')
+    if session_id is None and request.is_json:
+        session_id = (request.get_json(silent=True) or {}).get('session_id')
+    g.session_id = session_id
+
+@app.after_request
+def log_request_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(
+            f"{request.method} {request.path} {response.status_code} {latency_ms}ms",
+            extra={'sample': 'access', 'latency_ms': latency_ms, 'status': response.status_code}
+        )
+    return response
+
+@app.before_request
+def start_request_profile():
+    """Run this request under a profiler when asked to via X-Profile or ?profile=."""
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    if not mode:
+        return
+    mode = 'sample' if mode in ('1', 'true') else mode
+    if mode not in profiling.PROFILE_MODES:
+        return
+    if not profiling.admin_token_valid(_supplied_admin_token(), app.config['ADMIN_TOKEN']):
+        logger.warning(f"Rejected profiling request for {request.path}: invalid admin token")
+        return
+    if not profiling.try_acquire():
+        g.profile_status = 'busy'
+        return
+    # Flask's dispatch frame stays live for the whole request; samples without it
+    # were taken while this request was switched out
+    anchor = sys._getframe()
+    while anchor is not None and anchor.f_code.co_name != 'full_dispatch_request':
+        anchor = anchor.f_back
+    g.request_profile = profiling.RequestProfile(
+        mode,
+        profiling.current_thread_id(),
+        anchor_frame=anchor,
+        interval=app.config['PROFILE_SAMPLE_INTERVAL']
+    )
+    g.request_profile.start()
+
+def _finish_request_profile(status_code):
+    profile = g.pop('request_profile', None)
+    if profile is None:
+        return None
+    try:
+        profile.stop()
+        name = profile_store.save(profile, request.endpoint, request.path, status_code)
+        logger.info(f"Saved {profile.mode} profile for {request.path}: {name} ({profile.duration * 1000:.1f} ms)")
+        return name
+    except Exception as e:
+        logger.error(f"Failed to save request profile: {e}")
+        return None
+    finally:
+        profiling.release()
+
+@app.after_request
+def stop_request_profile(response):
+    name = _finish_request_profile(response.status_code)
+    if name:
+        response.headers['X-Profile-Id'] = name
+    elif g.get('profile_status'):
+        response.headers['X-Profile-Status'] = g.profile_status
+    return response
+
+@app.teardown_request
+def abort_request_profile(exc):
+    # Only reached with a live profile when the view raised before after_request ran
+    _finish_request_profile(500)
+
 def generate_analysis_id():
     """Generate unique analysis session ID"""
     return str(uuid.uuid4())[:8]
 
-def simulate_video_analysis(video_filename, session_id):
+def resolve_site(video_filename, coordinates=None, video_path=None):
+    """
+    Resolve the monitored site for an upload.
+
+    The filename is matched against site aliases first; otherwise GPS
+    coordinates (from the client, or read from the video metadata) are
+    resolved to the nearest site within SITE_MATCH_RADIUS_KM.
+
+    Returns:
+        tuple: (site or None, coordinates or None, source)
+    """
+    site = site_registry.match_filename(video_filename)
+    if site is not None:
+        return site, None, 'filename'
+    if coordinates is None:
+        coordinates = read_video_gps(video_path)
+        if video_path:
+            upload_storage.touch(os.path.basename(video_path))
+    if coordinates is not None:
+        site, distance_km = site_registry.nearest(*coordinates, max_km=app.config['SITE_MATCH_RADIUS_KM'])
+        if site is not None:
+            logger.info(f"GPS position {coordinates} resolved to {site.name} ({distance_km:.1f} km)")
+            return site, coordinates, 'gps'
+    return None, None, None
+
+# Frames the simulated pipeline processes per second of stage work
+SIMULATED_FPS = 30
+
+def _run_stage(stage, state, rng):
+    """
+    Compute the metrics produced by one pipeline stage into state['metrics'].
+
+    The random draws happen in the same order as the original single-pass
+    simulation, so results for a session id are unchanged.
+    """
+    results = state['metrics']
+    site = site_registry.get(state['site']) if state['site'] else None
+    profile = site_registry.profile_for(site, state['video_filename'])
+    if stage == 'initialize':
+        # Determine location from filename aliases or GPS; profiles come from the site registry
+        site, gps, location_source = resolve_site(state['video_filename'], state['coordinates'], state['video_path'])
+        state['site'] = site.name if site is not None else None
+        state['gps'] = list(gps) if gps is not None else None
+        state['location_source'] = location_source
+    elif stage == 'fish_density':
+        results['fish_density'] = rng.randint(*profile['fish_density'])  # fish/ha
+    elif stage == 'invertebrate_cover':
+        results['invertebrate_cover'] = rng.randint(*profile['invertebrate_cover'])  # percentage
+    elif stage == 'coral_bleaching':
+        results['coral_bleaching'] = rng.randint(*profile['coral_bleaching'])  # percentage
+    elif stage == 'invasive_species':
+        # Always have invasive species as 0 (as specified)
+        results['invasive_species'] = 0
+    elif stage == 'algal_bloom':
+        results['algal_bloom_score'] = round(rng.uniform(*profile['algal_bloom_score']), 2)
+        results['algal_bloom_level'] = profile['algal_bloom_level']
+        if site is not None and site.profile:
+            logger.info(f"{site.name} specific data generated for session: {state['session_id']}")
+        elif results['algal_bloom_level'] == 'High':
+            logger.info(f"Algal bloom detected in filename: {state['video_filename']}")
+    elif stage == 'indices':
+        # Calculate Fish Health Index (FHI) as specified
+        results['fish_health_index'] = round((results['fish_density'] / 300) * 0.6 + (results['invertebrate_cover'] / 100) * 0.4, 2)
+    elif stage == 'report':
+        # If location wasn't determined by filename or GPS, randomly select one
+        location_source = state['location_source']
+        if site is None:
+            site = rng.choice(site_registry.sites)
+            location_source = 'random'
+        # Set location metadata; a measured GPS position is kept over the site's reference point
+        results['location'] = site.name
+        lat, lng = state['gps'] if state['gps'] is not None else (site.lat, site.lng)
+        results['coordinates'] = {"lat": lat, "lng": lng}
+        results['location_source'] = location_source
+        results['date'] = datetime.now().strftime('%Y-%m-%d')
+        results['diver'] = 'Simulated Divemaster'
+        results['depth_range'] = f"{rng.randint(5, 12)}-{rng.randint(13, 18)} m"
+        results['video_filename'] = state['video_filename']
+        results['session_id'] = state['session_id']
+
+def _save_checkpoint(state, rng):
+    """Durably record pipeline progress so the analysis can resume after a restart."""
+    state['rng_state'] = rng.getstate()
+    state['updated'] = datetime.now().isoformat(timespec='seconds')
+    try:
+        checkpoint_store.save(state['session_id'], state)
+    except OSError as e:
+        logger.error(f"Could not write checkpoint for session {state['session_id']}: {e}")
+
+def simulate_video_analysis(video_filename, session_id, coordinates=None, video_path=None, emit_steps=True,
+                            checkpoint=None):
     """
     Simulate video analysis pipeline with realistic timing and logging
     Args:
         video_filename (str): Name of uploaded video file
         session_id (str): Unique session identifier
+        coordinates (tuple): Optional (lat, lng) of the dive supplied by the client
+        video_path (str): Optional path of the saved video, used to read GPS metadata
+        emit_steps (bool): Emit per-step progress events (batch campaigns report their own)
+        checkpoint (dict): Checkpoint of an interrupted run to resume from
+    Returns:
+        dict: The analysis results
     """
-    logger.info(f"Starting video analysis for {video_filename} (Session: {session_id})")
-    
-    # Analysis steps with realistic timing
-    analysis_steps = [
-        ("Initializing video processing pipeline...", 2),
-        ("Extracting frames for analysis...", 3),
-        ("Analyzing fish density using computer vision...", 5),
-        ("Identifying fish species and counting individuals...", 4),
-        ("Estimating invertebrate cover using segmentation...", 4),
-        ("Detecting coral bleaching patterns...", 3),
-        ("Screening for invasive species...", 3),
-        ("Performing algal bloom detection...", 2),
-        ("Computing ecological indices...", 2),
-        ("Generating assessment report...", 1)
-    ]
+    current_session_id.set(session_id)
     
-    # Initialize analysis results
-    results = {}
-    
-    # Set random seed for reproducibility (user rule #15)
-    random.seed(session_id[:5].encode('utf-8').hex())
-    
-    for step_desc, duration in analysis_steps:
-        socketio.emit('analysis_step', {
+    # Set random seed for reproducibility (user rule #15); a private generator
+    # lets the sequence be checkpointed and restored with the rest of the state
+    rng = random.Random(session_id[:5].encode('utf-8').hex())
+    if checkpoint is None:
+        logger.info(f"Starting video analysis for {video_filename} (Session: {session_id})")
+        state = {
             'session_id': session_id,
-            'message': step_desc,
-            'timestamp': datetime.now().strftime('%H:%M:%S')
-        })
-        time.sleep(duration)
-    
-    # Determine location based on filename or use random choice
-    location = None
-    
-    if 'la_paz' in video_filename.lower() or 'lapaz' in video_filename.lower():
-        # La Paz specific data - lower fish health than Cabo Pulmo
-        location = next((loc for loc in GULF_LOCATIONS if loc['name'] == 'La Paz'), None)
-        results['fish_density'] = random.randint(70, 160)  # Lower than Cabo Pulmo
-        results['invertebrate_cover'] = random.randint(20, 45)  # Lower cover
-        results['coral_bleaching'] = random.randint(15, 30)  # Higher bleaching
-        results['algal_bloom_score'] = round(random.uniform(0.3, 0.5), 2)  # Medium algal bloom risk
-        results['algal_bloom_level'] = 'Medium'
-        logger.info(f"La Paz specific data generated for session: {session_id}")
-    
-    elif 'loreto' in video_filename.lower():
-        # Loreto specific data - lower fish health than Cabo Pulmo
-        location = next((loc for loc in GULF_LOCATIONS if loc['name'] == 'Loreto'), None)
-        results['fish_density'] = random.randint(80, 180)  # Lower than Cabo Pulmo
-        results['invertebrate_cover'] = random.randint(25, 50)  # Lower cover
-        results['coral_bleaching'] = random.randint(12, 25)  # Medium bleaching
-        results['algal_bloom_score'] = round(random.uniform(0.2, 0.4), 2)  # Low-medium algal bloom
-        results['algal_bloom_level'] = 'Medium-Low'
-        logger.info(f"Loreto specific data generated for session: {session_id}")
-    
-    elif 'corredor' in video_filename.lower():
-        # Corredor specific data - lower fish health than Cabo Pulmo
-        location = next((loc for loc in GULF_LOCATIONS if loc['name'] == 'Corredor'), None)
-        results['fish_density'] = random.randint(60, 150)  # Lower than Cabo Pulmo
-        results['invertebrate_cover'] = random.randint(15, 40)  # Lower cover
-        results['coral_bleaching'] = random.randint(18, 35)  # Higher bleaching
-        results['algal_bloom_score'] = round(random.uniform(0.4, 0.6), 2)  # Medium-high algal bloom
-        results['algal_bloom_level'] = 'Medium-High'
-        logger.info(f"Corredor specific data generated for session: {session_id}")
-    
-    elif 'cabo_pulmo' in video_filename.lower() or 'cabopulmo' in video_filename.lower():
-        # Cabo Pulmo baseline data (healthiest site)
-        location = next((loc for loc in GULF_LOCATIONS if loc['name'] == 'Cabo Pulmo'), None)
-        results['fish_density'] = random.randint(200, 280)  # High fish density
-        results['invertebrate_cover'] = random.randint(50, 65)  # High cover
-        results['coral_bleaching'] = random.randint(3, 10)  # Low bleaching
-        results['algal_bloom_score'] = round(random.uniform(0.05, 0.15), 2)  # Low algal bloom
-        results['algal_bloom_level'] = 'Low'
-        logger.info(f"Cabo Pulmo baseline data generated for session: {session_id}")
-    
+            'video_filename': video_filename,
+            'video_path': video_path,
+            'coordinates': list(coordinates) if coordinates is not None else None,
+            'emit_steps': emit_steps,
+            'stage': None,        # last completed stage
+            'stage_index': 0,     # stage in progress
+            'frame_offset': 0,    # frames of the stage in progress already processed
+            'metrics': {},        # partial results
+            'site': None,
+            'gps': None,
+            'location_source': None
+        }
+        _save_checkpoint(state, rng)
     else:
-        # Random generation for other locations
-        results['fish_density'] = random.randint(50, 300)  # fish/ha
-        results['invertebrate_cover'] = random.randint(10, 70)  # percentage
-        results['coral_bleaching'] = random.randint(5, 30)  # percentage
-        
-        # Special handling for algal bloom based on filename
-        if 'algal_bloom' in video_filename.lower():
-            results['algal_bloom_score'] = round(random.uniform(0.7, 0.9), 2)
-            results['algal_bloom_level'] = 'High'
-            logger.info(f"Algal bloom detected in filename: {video_filename}")
-        else:
-            results['algal_bloom_score'] = round(random.uniform(0.05, 0.3), 2)
-            results['algal_bloom_level'] = 'Low'
-    
-    # Always have invasive species as 0 (as specified)
-    results['invasive_species'] = 0
-    
-    # Calculate Fish Health Index (FHI) as specified
-    results['fish_health_index'] = round((results['fish_density'] / 300) * 0.6 + (results['invertebrate_cover'] / 100) * 0.4, 2)
+        state = checkpoint
+        version, internal_state, gauss_next = state['rng_state']
+        rng.setstate((version, tuple(internal_state), gauss_next))
+        logger.info(
+            f"Resuming video analysis for {video_filename} (Session: {session_id}) after stage "
+            f"'{state['stage']}' at frame {state['frame_offset']}"
+        )
     
-    # If location wasn't determined by filename, randomly select one
-    if location is None:
-        location = random.choice(GULF_LOCATIONS)
+    while state['stage_index'] < len(ANALYSIS_STAGES):
+        stage, step_desc, _ = ANALYSIS_STAGES[state['stage_index']]
+        if emit_steps:
+            socketio.emit('analysis_step', {
+                'session_id': session_id,
+                'message': step_desc,
+                'timestamp': datetime.now().strftime('%H:%M:%S')
+            })
+        # Work through the stage one second of frames at a time, checkpointing the offset
+        total_frames = round(stage_durations[stage] * SIMULATED_FPS)
+        if total_frames == 0:
+            simulation_clock.sleep(0)
+        while state['frame_offset'] < total_frames:
+            simulation_clock.sleep(min(SIMULATED_FPS, total_frames - state['frame_offset']) / SIMULATED_FPS)
+            state['frame_offset'] = min(total_frames, state['frame_offset'] + SIMULATED_FPS)
+            if state['frame_offset'] < total_frames:
+                _save_checkpoint(state, rng)
+        _run_stage(stage, state, rng)
+        state['stage'] = stage
+        state['stage_index'] += 1
+        state['frame_offset'] = 0
+        _save_checkpoint(state, rng)
     
-    # Set location metadata
-    results['location'] = location['name']
-    results['coordinates'] = {"lat": location['lat'], "lng": location['lng']}
-    results['date'] = datetime.now().strftime('%Y-%m-%d')
-    results['diver'] = 'Simulated Divemaster'
-    results['depth_range'] = f"{random.randint(5, 12)}-{random.randint(13, 18)} m"
-    results['video_filename'] = video_filename
-    results['session_id'] = session_id
+    results = state['metrics']
     
-    # Store results in global session storage
+    # Store results in global session storage and persist them
     analysis_sessions[session_id] = results
+    try:
+        session_store.save(session_id, results)
+    except OSError as e:
+        logger.error(f"Could not persist results for session {session_id}: {e}")
+    else:
+        checkpoint_store.delete(session_id)
+    if survey_index is not None:
+        # Not built yet means it will pick this session up from the store
+        survey_index.add_results(results)
+    if site_rollups is not None:
+        site_rollups.add_results(results)
     
     socketio.emit('analysis_complete', {
         'session_id': session_id,
@@ -265,18 +568,75 @@ def simulate_video_analysis(video_filename, session_id):
         'message': 'Analysis complete! Generating report...'
     })
     
+    # The raw video is now evictable; keep a small proxy if configured
+    upload_storage.create_proxy(session_id)
+    
     logger.info(f"Analysis completed for session {session_id}")
-    logger.info(f"Results: FHI={results['fish_health_index']:.2f}, Fish={results['fish_density']}, Algal={results['algal_bloom_level']}")
+    logger.info(
+        f"Results: FHI={results['fish_health_index']:.2f}, Fish={results['fish_density']}, Algal={results['algal_bloom_level']}",
+        extra={'sample': 'analysis_results', 'location': results['location']}
+    )
+    return results
+
+def resume_unfinished_analyses():
+    """Restart analyses interrupted by a crash or redeploy from their last checkpoint."""
+    resumed = 0
+    for session_id in list(checkpoint_store.session_ids()):
+        checkpoint = checkpoint_store.load(session_id)
+        if checkpoint is None:
+            continue
+        if session_store.exists(session_id):
+            # Finished, but stopped before the checkpoint was cleared
+            checkpoint_store.delete(session_id)
+            continue
+        analysis_thread = Thread(
+            target=simulate_video_analysis,
+            args=(checkpoint['video_filename'], session_id),
+            kwargs={
+                'coordinates': checkpoint['coordinates'],
+                'video_path': checkpoint['video_path'],
+                'emit_steps': checkpoint['emit_steps'],
+                'checkpoint': checkpoint
+            }
+        )
+        analysis_thread.daemon = True
+        analysis_thread.start()
+        resumed += 1
+    if resumed:
+        logger.info(f"Resumed {resumed} unfinished analyses from checkpoints")
+    return resumed
 
 @app.route('/')
 def index():
     """Main application interface"""
-    logger.info("Serving main application interface")
+    logger.info("Serving main application interface", extra={'sample': 'page_view'})
     return render_template('index.html')
 
 @app.route('/upload', methods=['POST'])
 def upload_video():
     """Handle video file upload and trigger analysis"""
+    # Refuse uploads that cannot fit before the request body is streamed to disk
+    expected_size = request.content_length or 0
+    if not upload_storage.reserve(expected_size):
+        logger.warning(f"Upload refused: {expected_size / 1048576:.1f} MB does not fit in upload storage")
+        return jsonify({'error': 'Not enough storage space for this upload. Please try again later.'}), 507
+    try:
+        return _save_upload_and_analyze()
+    finally:
+        upload_storage.release(expected_size)
+
+def parse_coordinates(values):
+    """Return (lat, lng) from request values with 'lat' and 'lng', or None if absent or invalid."""
+    try:
+        lat, lng = float(values['lat']), float(values['lng'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+def _save_upload_and_analyze():
+    """Save the uploaded video and start its analysis."""
     if 'video' not in request.files:
         return jsonify({'error': 'No video file provided'}), 400
     
@@ -298,6 +658,7 @@ def upload_video():
     
     try:
         file.save(filepath)
+        upload_storage.register(filename, session_id)
         logger.info(f"Video uploaded successfully: {filename}")
         
         # Add to upload history
@@ -311,7 +672,8 @@ def upload_video():
         # Start analysis in background thread
         analysis_thread = Thread(
             target=simulate_video_analysis,
-            args=(file.filename, session_id)
+            args=(file.filename, session_id),
+            kwargs={'coordinates': parse_coordinates(request.form), 'video_path': filepath}
         )
         analysis_thread.daemon = True
         analysis_thread.start()
@@ -327,14 +689,140 @@ def upload_video():
         logger.error(f"Upload failed: {str(e)}")
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
+def _analyze_campaign_item(campaign, item):
+    """Extract (for archives) and analyse one campaign video; runs on a campaign worker."""
+    session_id = generate_analysis_id()
+    if campaign.archive_path:
+        filename = f"{session_id}_{item['name']}"
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if not upload_storage.reserve(item['size']):
+            raise RuntimeError('Not enough storage space to extract this video')
+        try:
+            campaign.extract(item, filepath)
+            upload_storage.register(filename, session_id)
+        finally:
+            upload_storage.release(item['size'])
+    else:
+        filepath = item['path']
+    upload_history.append({
+        'session_id': session_id,
+        'filename': item['name'],
+        'upload_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'filepath': filepath,
+        'campaign_id': campaign.campaign_id
+    })
+    return simulate_video_analysis(item['name'], session_id, video_path=filepath, emit_steps=False)
+
+def start_campaign(items, archive_path=None, reserved_bytes=0):
+    """
+    Register and start a batch campaign over the given videos.
+
+    An uploaded archive is deleted when the campaign ends, and only then is
+    the `reserved_bytes` of upload storage held for it released.
+    """
+    campaign = Campaign(
+        generate_analysis_id(), items, _analyze_campaign_item,
+        workers=app.config['BATCH_WORKERS'],
+        emit=socketio.emit,
+        archive_path=archive_path,
+        remove_archive=archive_path is not None,
+        on_finish=(lambda: upload_storage.release(reserved_bytes)) if reserved_bytes else None
+    )
+    campaigns[campaign.campaign_id] = campaign
+    campaign.start()
+    return campaign
+
+@app.route('/batch', methods=['POST'])
+def batch_ingest():
+    """
+    Start a batch campaign from an uploaded ZIP ('archive' file field) or a
+    server-side directory ('directory' field, admin only, under BATCH_IMPORT_ROOT).
+
+    Progress is streamed as 'campaign_progress' Socket.IO events and a final
+    'campaign_complete' summary; GET /batch/<campaign_id> returns the same data.
+    """
+    # Reading request.files streams a multipart body to disk, so the quota is checked first
+    archive = None
+    if request.mimetype == 'multipart/form-data':
+        expected_size = request.content_length or 0
+        if not upload_storage.reserve(expected_size):
+            logger.warning(f"Archive refused: {expected_size / 1048576:.1f} MB does not fit in upload storage")
+            return jsonify({'error': 'Not enough storage space for this upload. Please try again later.'}), 507
+        archive = request.files.get('archive')
+        if archive is None:
+            upload_storage.release(expected_size)
+    if archive is not None:
+        # The archive lives in a dot folder the storage index does not track, so its
+        # reservation is held (at its actual size) until the campaign deletes it
+        archive_path = None
+        try:
+            archive_folder = os.path.join(app.config['UPLOAD_FOLDER'], '.campaigns')
+            os.makedirs(archive_folder, exist_ok=True)
+            archive_path = os.path.join(archive_folder, f"{uuid.uuid4().hex}.zip")
+            archive.save(archive_path)
+            archive_size = os.path.getsize(archive_path)
+            items = zip_items(archive_path)
+        except Exception as e:
+            upload_storage.release(expected_size)
+            if archive_path and os.path.exists(archive_path):
+                os.remove(archive_path)
+            if isinstance(e, zipfile.BadZipFile):
+                return jsonify({'error': 'The archive is not a valid ZIP file'}), 400
+            raise
+        held_bytes = min(archive_size, expected_size)
+        upload_storage.release(expected_size - held_bytes)
+        if not items:
+            upload_storage.release(held_bytes)
+            os.remove(archive_path)
+            return jsonify({'error': 'The archive contains no videos'}), 400
+        campaign = start_campaign(items, archive_path=archive_path, reserved_bytes=held_bytes)
+    else:
+        directory = (request.get_json(silent=True) or request.form).get('directory')
+        if not directory:
+            return jsonify({'error': 'Provide a ZIP archive or a server directory'}), 400
+        if not profiling.admin_token_valid(_supplied_admin_token(), app.config['ADMIN_TOKEN']):
+            return jsonify({'error': 'Admin token required'}), 403
+        root = app.config['BATCH_IMPORT_ROOT']
+        if not root:
+            return jsonify({'error': 'Directory imports are disabled (BATCH_IMPORT_ROOT is not set)'}), 403
+        root = os.path.realpath(root)
+        folder = os.path.realpath(os.path.join(root, directory))
+        if os.path.commonpath([root, folder]) != root:
+            return jsonify({'error': 'Directory must be inside BATCH_IMPORT_ROOT'}), 403
+        if not os.path.isdir(folder):
+            return jsonify({'error': 'Directory not found'}), 404
+        items = directory_items(folder)
+        if not items:
+            return jsonify({'error': 'The directory contains no videos'}), 400
+        campaign = start_campaign(items)
+    
+    logger.info(f"Batch campaign {campaign.campaign_id} queued with {len(campaign.items)} videos")
+    return jsonify({
+        'success': True,
+        'campaign_id': campaign.campaign_id,
+        'total': len(campaign.items),
+        'workers': campaign.workers,
+        'message': 'Campaign started. Progress is reported as campaign_progress events.'
+    })
+
+@app.route('/batch/<campaign_id>')
+def batch_status(campaign_id):
+    """Return progress (and, once finished, the summary) of a batch campaign."""
+    campaign = campaigns.get(campaign_id)
+    if campaign is None:
+        return jsonify({'error': 'Campaign not found'}), 404
+    return jsonify(campaign.summary() if campaign.status == 'complete' else campaign.progress())
+
 @app.route('/results/<session_id>')
 def get_results(session_id):
     """Retrieve analysis results for a session"""
-    if session_id not in analysis_sessions:
+    results = get_session_results(session_id)
+    if results is None:
         return jsonify({'error': 'Session not found'}), 404
+    # Viewing a session keeps its video (or proxy) recently used for LRU eviction
+    upload_storage.touch_session(session_id)
     
-    results = analysis_sessions[session_id]
-    logger.info(f"Serving results for session {session_id}")
+    logger.info(f"Serving results for session {session_id}", extra={'sample': 'serve_results'})
     return jsonify(results)
 
 @app.route('/get-history')
@@ -345,9 +833,70 @@ def get_history():
 @app.route('/history')
 def history_alias():
     """Alias route for upload history to match frontend expectation."""
-    logger.info("Alias route /history called; serving upload history")
+    logger.info("Alias route /history called; serving upload history", extra={'sample': 'page_view'})
     return jsonify(upload_history)
 
+@app.route('/export/<fmt>')
+def export_sessions(fmt):
+    """
+    Stream every stored session as CSV, GeoJSON or Parquet.
+
+    Query parameters (all optional): site, from and to (ISO dates, inclusive),
+    min_fhi and max_fhi. Sessions are read and written one at a time.
+    """
+    if fmt not in export.FORMATS:
+        return jsonify({'error': f"Unknown format '{fmt}'. Use one of: {', '.join(export.FORMATS)}"}), 404
+    site_name = None
+    if request.args.get('site'):
+        site = site_registry.get(request.args['site'])
+        if site is None:
+            return jsonify({'error': f"Unknown site '{request.args['site']}'"}), 404
+        site_name = site.name
+    fhi_bounds = {}
+    for param in ('min_fhi', 'max_fhi'):
+        value = request.args.get(param)
+        if value is None:
+            continue
+        try:
+            bound = float(value)
+        except ValueError:
+            bound = float('nan')
+        if not math.isfinite(bound):
+            return jsonify({'error': f'{param} must be a number'}), 400
+        fhi_bounds[param] = bound
+    try:
+        export_filter = export.ExportFilter(
+            site=site_name,
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            **fhi_bounds
+        )
+        for bound in (export_filter.date_from, export_filter.date_to):
+            if bound is not None:
+                datetime.strptime(bound, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+    
+    rows = export.export_rows(session_store.iter_results(), export_filter)
+    if fmt == 'csv':
+        chunks = export.iter_csv(rows)
+    elif fmt == 'geojson':
+        chunks = export.iter_geojson(rows)
+    else:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return jsonify({'error': 'Parquet export requires pyarrow, which is not installed'}), 501
+        chunks = export.iter_parquet(rows)
+    
+    mimetype, extension = export.FORMATS[fmt]
+    logger.info(f"Streaming {fmt} export")
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=reef_sessions_{datetime.now().strftime("%Y%m%d")}.{extension}'}
+    )
+
 @app.route('/generate-pdf', methods=['POST'])
 def generate_pdf():
     """Generate a PDF report from analysis results."""
@@ -357,9 +906,16 @@ def generate_pdf():
         session_id = data.get('session_id')
         results = data.get('results')
         
-        if not session_id or not results or session_id not in analysis_sessions:
+        if not session_id or not results or get_session_results(session_id) is None:
             return jsonify({'error': 'Invalid session or missing data'}), 400
         
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib import colors
+        from reportlab.lib.units import inch
+        plt = load_pyplot()
+        
         # Generate PDF using ReportLab
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(
@@ -375,7 +931,7 @@ def generate_pdf():
         styles = getSampleStyleSheet()
         styles.add(
             ParagraphStyle(
-                name='Title',
+                name='ReportTitle',
                 parent=styles['Heading1'],
                 fontName='Helvetica-Bold',
                 fontSize=18,
@@ -385,7 +941,7 @@ def generate_pdf():
         )
         styles.add(
             ParagraphStyle(
-                name='Subtitle',
+                name='ReportSubtitle',
                 parent=styles['Heading2'],
                 fontName='Helvetica-Bold',
                 fontSize=14,
@@ -394,7 +950,7 @@ def generate_pdf():
         )
         styles.add(
             ParagraphStyle(
-                name='Normal',
+                name='ReportBody',
                 parent=styles['Normal'],
                 fontSize=10,
                 spaceAfter=6
@@ -405,18 +961,18 @@ def generate_pdf():
         story = []
         
         # Title
-        story.append(Paragraph(f"Rapid Reef Assessment Report", styles['Title']))
-        story.append(Paragraph(f"Location: {results['location']}", styles['Subtitle']))
+        story.append(Paragraph(f"Rapid Reef Assessment Report", styles['ReportTitle']))
+        story.append(Paragraph(f"Location: {results['location']}", styles['ReportSubtitle']))
         story.append(Spacer(1, 0.25*inch))
         
         # Metadata Table
         metadata = [
-            ["Date", results.get('date', datetime.datetime.now().strftime("%Y-%m-%d"))],
+            ["Date", results.get('date', datetime.now().strftime("%Y-%m-%d"))],
             ["Location", results['location']],
             ["Diver", results.get('diver', 'Unknown')],
             ["Depth Range", results.get('depth_range', '5-15m')],
             ["Assessment ID", session_id],
-            ["Report Generated", datetime.datetime.now().strftime("%Y-%m-%d %H:%M")]
+            ["Report Generated", datetime.now().strftime("%Y-%m-%d %H:%M")]
         ]
         
         meta_table = Table(metadata, colWidths=[1.5*inch, 4*inch])
@@ -434,7 +990,7 @@ def generate_pdf():
         story.append(Spacer(1, 0.5*inch))
         
         # Health Status Table
-        story.append(Paragraph("Ecosystem Health Metrics", styles['Subtitle']))
+        story.append(Paragraph("Ecosystem Health Metrics", styles['ReportSubtitle']))
         story.append(Spacer(1, 0.1*inch))
         
         # Functions to determine status
@@ -549,12 +1105,12 @@ def generate_pdf():
         else:
             conclusion_text += "Algal bloom risk is currently low, indicating reasonable water quality at this site."
         
-        story.append(Paragraph("Conclusion", styles['Subtitle']))
-        story.append(Paragraph(conclusion_text, styles['Normal']))
+        story.append(Paragraph("Conclusion", styles['ReportSubtitle']))
+        story.append(Paragraph(conclusion_text, styles['ReportBody']))
         
         # Add timestamp and disclaimer
         story.append(Spacer(1, 0.5*inch))
-        story.append(Paragraph(f"Report generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles["Normal"]))
+        story.append(Paragraph(f"Report generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['ReportBody']))
         story.append(Paragraph("Disclaimer: This is a simulated assessment for demonstration purposes only.", 
                              ParagraphStyle('Disclaimer', parent=styles['Normal'], fontSize=8, fontName='Helvetica-Oblique'))) 
         
@@ -570,7 +1126,7 @@ def generate_pdf():
             buffer,
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f"reef_assessment_{results['location'].lower().replace(' ', '_')}_{datetime.datetime.now().strftime('%Y%m%d')}.pdf"
+            download_name=f"reef_assessment_{results['location'].lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.pdf"
         )
         
     except Exception as e:
@@ -584,35 +1140,25 @@ def chatbot_response():
     query = data.get('query', '').lower()
     session_id = data.get('session_id')
     
-    session_results = analysis_sessions.get(session_id, {})
+    session_results = get_session_results(session_id) or {}
     location = session_results.get('location', 'this area')
-    response = ""
 
     # --- Predefined Logic ---
-    if 'fish trend' in query:
-        # (Existing logic for fish trends...)
-        historical_density = round(random.uniform(180, 220))
-        current_density = session_results.get('fish_density', 150)
-        trend_direction = "a decrease" if current_density < historical_density else "an increase"
-        percentage_change = abs(round(((current_density - historical_density) / historical_density) * 100))
-        response = f"""Historically, fish density in {location} has averaged around {historical_density} fish/ha. The current assessment shows {current_density} fish/ha, a {trend_direction} of {percentage_change}%."""
-
-    elif 'temperature' in query and ('correlates' in query or 'biomass' in query or 'fish' in query):
-        # (Existing logic for temperature correlation...)
-        current_temp = round(random.uniform(25.5, 28.0), 1)
-        historical_temp = round(current_temp - random.uniform(1.0, 2.5), 1)
-        response = f"""Our data shows a warming trend in {location}, with temperatures rising from an average of {historical_temp}°C to {current_temp}°C. This is driving 'tropicalization,' where warmer-water species increase and cooler-water species decline, impacting the local food web."""
-
-    elif 'cabo pulmo' in query or 'baseline' in query:
-        # (Existing logic for baseline comparison...)
-        current_fhi = session_results.get('fish_health_index', 0.5)
-        cabo_fhi = CABO_PULMO_BASELINE['fish_health_index']
-        response = f"""This site's Fish Health Index is {current_fhi:.2f}, compared to Cabo Pulmo's baseline of {cabo_fhi}. The primary difference is often predator biomass and enforcement levels."""
+    context = ChatContext(
+        query,
+        session_results,
+        CABO_PULMO_BASELINE,
+        rollups=get_site_rollups(),
+        site_names=[site.name for site in site_registry.sites]
+    )
+    intent, response = chat_router.route(context)
+    if intent is not None:
+        logger.info(f"Chatbot intent '{intent}' answered query for session {session_id}", extra={'sample': 'chatbot_intent'})
 
     # --- OpenAI API Fallback ---
     if not response:
         logger.info(f"No predefined response found for query: '{query}'. Calling OpenAI API.")
-        if not openai.api_key:
+        if not OPENAI_API_KEY:
             response = "OpenAI API key is not configured. Please ask the administrator to set it up."
         else:
             try:
@@ -645,9 +1191,10 @@ def chatbot_response():
                 # Randomly select a source to credit for this analysis
                 source_type = random.choice(['papers', 'databases'])
                 selected_source = random.choice(citations_data[source_type])
-                selected_source['used'] += 1
+                citation_usage.increment(source_type, selected_source['citation'])
                 logger.info(f"Cited source for this query: {selected_source['citation']}")
 
+                openai = load_openai()
                 completion = openai.chat.completions.create(
                     model="gpt-3.5-turbo",
                     messages=[
@@ -667,6 +1214,7 @@ def chatbot_response():
     
     return jsonify({
         'response': response.replace("        ", "").strip(),
+        'intent': intent or 'openai',
         'timestamp': datetime.now().strftime('%H:%M:%S')
     })
 
@@ -684,22 +1232,159 @@ def handle_disconnect():
 @app.route('/citations')
 def citations():
     """Display the citation and impact tracking page."""
-    # Sort by usage count in descending order
-    sorted_papers = sorted(citations_data['papers'], key=lambda x: x['used'], reverse=True)
-    sorted_databases = sorted(citations_data['databases'], key=lambda x: x['used'], reverse=True)
-    return render_template('citations.html', papers=sorted_papers, databases=sorted_databases)
+    # Already ordered by usage count, most used first
+    return render_template(
+        'citations.html',
+        papers=citation_usage.sorted_view('papers'),
+        databases=citation_usage.sorted_view('databases')
+    )
 
 @app.route('/about')
 def about():
     """Display the about page with information on vision method and index method."""
-    logger.info("About page accessed")
+    logger.info("About page accessed", extra={'sample': 'page_view'})
     return render_template('about.html')
 
+@app.route('/sites')
+def list_sites():
+    """List the monitored sites from the site registry."""
+    return jsonify([site.to_dict() for site in site_registry.sites])
+
+@app.route('/sites/nearest')
+def nearest_site():
+    """Resolve a GPS position (?lat=&lng=) to the nearest monitored site."""
+    coordinates = parse_coordinates(request.args)
+    if coordinates is None:
+        return jsonify({'error': 'Valid lat and lng query parameters are required'}), 400
+    max_km = request.args.get('max_km', type=float)
+    site, distance_km = site_registry.nearest(*coordinates, max_km=max_km)
+    if site is None:
+        return jsonify({'error': 'No monitored site within range'}), 404
+    return jsonify({**site.to_dict(), 'distance_km': round(distance_km, 3)})
+
+@app.route('/sites/<name>/summary')
+def site_summary(name):
+    """
+    Return precomputed metric summaries for a site.
+
+    Query parameters: period ('all' or 'YYYY-MM', default 'all').
+    Each metric has count, mean, min, max, p10/p50/p90 and trend per 30 days.
+    """
+    site = site_registry.get(name)
+    if site is None:
+        return jsonify({'error': f"Unknown site '{name}'"}), 404
+    rollups = get_site_rollups()
+    period = request.args.get('period', ALL_PERIODS)
+    summary = rollups.summary(site.name, period) or {'site': site.name, 'period': period, 'sessions': 0, 'metrics': {}}
+    return jsonify({**summary, 'periods': rollups.periods(site.name)})
+
+@app.route('/compare')
+def compare_sites():
+    """
+    Compare sites' mean metrics with the Cabo Pulmo baseline.
+
+    Query parameters: site (repeatable; default all registered sites) and
+    period ('all' or 'YYYY-MM', default 'all'). Sites without data are omitted.
+    """
+    names = request.args.getlist('site') or [site.name for site in site_registry.sites]
+    sites = []
+    for name in names:
+        site = site_registry.get(name)
+        if site is None:
+            return jsonify({'error': f"Unknown site '{name}'"}), 404
+        sites.append(site)
+    rollups = get_site_rollups()
+    period = request.args.get('period', ALL_PERIODS)
+    comparisons = [rollups.compare(site.name, CABO_PULMO_BASELINE, period) for site in sites]
+    return jsonify({
+        'baseline': CABO_PULMO_BASELINE,
+        'period': period,
+        'sites': [comparison for comparison in comparisons if comparison is not None]
+    })
+
+@app.route('/map/points')
+def map_points():
+    """
+    Return pre-aggregated survey clusters for a map view.
+
+    Query parameters: bbox=west,south,east,north (degrees) and zoom (map zoom level).
+    Each cluster has its mean position, number of surveys and mean FHI.
+    """
+    try:
+        west, south, east, north = (float(value) for value in request.args.get('bbox', '').split(','))
+        zoom = int(request.args.get('zoom', ''))
+    except ValueError:
+        return jsonify({'error': 'bbox=west,south,east,north and an integer zoom are required'}), 400
+    if not (-90 <= south <= north <= 90):
+        return jsonify({'error': 'Invalid bbox latitudes'}), 400
+    # Leaflet reports longitudes outside [-180, 180] after panning across the antimeridian
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west, east = ((west + 180) % 360) - 180, ((east + 180) % 360) - 180
+    try:
+        return jsonify(get_survey_index().query(west, south, east, north, zoom))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/assets/<filename>')
+def serve_asset(filename):
+    """Serve a fingerprinted bundle, pre-compressed when the client accepts it, with immutable caching."""
+    accepted = [encoding for encoding, _ in assets.ENCODINGS if request.accept_encodings[encoding]]
+    path, encoding = asset_manifest.resolve(filename, accepted)
+    if path is None:
+        return jsonify({'error': 'Asset not found'}), 404
+    response = send_file(
+        os.path.abspath(path),
+        mimetype=assets.MIMETYPES[os.path.splitext(filename)[1]],
+        max_age=31536000,
+        conditional=True
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = assets.CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/healthz')
 def healthz():
     """Lightweight health check endpoint for platform monitors."""
     return "ok", 200
 
+@app.route('/debug/loop-lag')
+@require_admin
+def loop_lag():
+    """Export event-loop lag percentiles and recently captured stalls."""
+    return jsonify(loop_monitor.snapshot())
+
+@app.route('/admin/storage')
+@require_admin
+def storage_stats():
+    """Report upload storage usage, quota and evictable videos."""
+    return jsonify(upload_storage.stats())
+
+@app.route('/admin/chatbot/intents')
+@require_admin
+def chatbot_intent_stats():
+    """Report per-intent hit counts, hit rates and routing latency."""
+    return jsonify(chat_router.stats())
+
+@app.route('/admin/profiles')
+@require_admin
+def list_profiles():
+    """List recently captured request profiles, newest first."""
+    return jsonify(profile_store.list())
+
+@app.route('/admin/profiles/<name>')
+@require_admin
+def download_profile(name):
+    """Download a stored profile (collapsed stacks or cProfile stats)."""
+    path = profile_store.path_for(name)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    mimetype = 'text/plain' if name.endswith('.collapsed') else 'application/octet-stream'
+    return send_file(os.path.abspath(path), mimetype=mimetype, as_attachment=True, download_name=name)
+
 if __name__ == '__main__':
     # Create necessary directories if they don't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -710,6 +1395,16 @@ if __name__ == '__main__':
     logger.info(f"Reports folder: {app.config['REPORTS_FOLDER']}")
     logger.info(f"OpenAI model configured: {os.getenv('OPENAI_API_KEY') is not None}")
 
+    # Event-loop diagnostics only make sense when we run the eventlet hub ourselves
+    if app.config['EVENTLET_DEBUG_BLOCKING']:
+        enable_blocking_detection(app.config['EVENTLET_DEBUG_BLOCKING_RESOLUTION'])
+    if app.config['LOOP_MONITOR_ENABLED']:
+        loop_monitor.start()
+    if app.config['WARMUP_ON_START']:
+        eventlet.spawn_after(app.config['WARMUP_DELAY'], warm_up)
+    if app.config['RESUME_ON_START']:
+        resume_unfinished_analyses()
+
     # Use a specific port to avoid conflicts
     port = int(os.environ.get('PORT', 8080))
 
@@ -0,0 +1,253 @@
+"""
+Bundled, fingerprinted and pre-compressed static assets.
+
+The build step (scripts/build_assets.py) concatenates the scripts and
+stylesheets of each bundle in BUNDLES, minifies them, and writes
+`<name>.<hash>.<ext>` to the asset folder along with `.gz` and `.br`
+copies and a manifest.json that maps bundle names to the fingerprinted
+files. Because a file's name changes whenever its content does, the
+server can let browsers cache it for a year without revalidating.
+
+The minifiers are deliberately conservative: they remove comments, indent
+and blank lines (and redundant whitespace in CSS) but never rewrite code,
+so line breaks are kept and automatic semicolon insertion is unaffected.
+
+Without a manifest (e.g. in development, before a build), templates fall
+back to the individual source files under static/.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Bundle name -> source files (relative to the static folder), in load order
+BUNDLES = {
+    'app.js': [
+        'js/app.js',
+        'js/console.js',
+        'js/report.js',
+        'js/chatbot.js',
+        'js/history.js',
+        'js/report-regeneration.js',
+        'js/map.js',
+        'js/pdf-export.js',
+    ],
+    'app.css': [
+        'css/style.css',
+        'css/custom.css',
+    ],
+    # The about and citations pages use the site styles without the app's overrides
+    'style.css': [
+        'css/style.css',
+    ],
+}
+
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Encodings tried in order of preference: (Accept-Encoding token, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+MIMETYPES = {
+    '.js': 'application/javascript',
+    '.css': 'text/css',
+}
+
+# A '/' after one of these (or at the start) begins a regex literal, not a division
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^\n')
+
+
+def _strip_js_comments(source):
+    """Remove // and /* */ comments, leaving strings, template literals and regexes intact."""
+    out = []
+    i, length = 0, len(source)
+    last_significant = '\n'
+    while i < length:
+        char = source[i]
+        pair = source[i:i + 2]
+        if pair == '//':
+            end = source.find('\n', i)
+            i = length if end == -1 else end
+            continue
+        if pair == '/*':
+            end = source.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            out.append(' ')
+            continue
+        if char in '\'"`' or (char == '/' and last_significant in _REGEX_PRECEDERS):
+            start = i
+            i += 1
+            in_class = False
+            while i < length:
+                current = source[i]
+                if current == '\\':
+                    i += 2
+                    continue
+                if char == '/':
+                    if current == '[':
+                        in_class = True
+                    elif current == ']':
+                        in_class = False
+                    elif current == '/' and not in_class:
+                        break
+                    elif current == '\n':
+                        break
+                elif current == char:
+                    break
+                i += 1
+            i += 1
+            out.append(source[start:i])
+            last_significant = char
+            continue
+        out.append(char)
+        if not char.isspace() or char == '\n':
+            last_significant = char
+        i += 1
+    return ''.join(out)
+
+
+def minify_js(source):
+    """Strip comments, indentation and blank lines from JavaScript."""
+    lines = (line.strip() for line in _strip_js_comments(source).splitlines())
+    return '\n'.join(line for line in lines if line) + '\n'
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from CSS."""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.DOTALL)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip() + '\n'
+
+
+def fingerprint(name, content):
+    """Return `name` with a content hash inserted before its extension."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _compressors():
+    compressors = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    try:
+        import brotli
+    except ImportError:
+        logger.warning("brotli is not installed; building gzip copies only")
+    else:
+        compressors.insert(0, ('.br', lambda data: brotli.compress(data, quality=11)))
+    return compressors
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def build_assets(static_folder, output_folder, bundles=BUNDLES):
+    """
+    Build every bundle into `output_folder` and write its manifest.
+
+    Files from the previous build are kept for one more generation, so pages
+    rendered just before a deploy can still load their assets; older ones
+    are deleted.
+
+    Returns:
+        dict: The new manifest
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    previous = AssetManifest.load(output_folder)
+    compressors = _compressors()
+    minifiers = {'.js': minify_js, '.css': minify_css}
+    manifest = {}
+    for name, sources in bundles.items():
+        ext = os.path.splitext(name)[1]
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+                parts.append(minifiers[ext](f.read()))
+        # Separate scripts so a file without a trailing semicolon cannot run into the next one
+        content = (';\n' if ext == '.js' else '').join(parts).encode('utf-8')
+        filename = fingerprint(name, content)
+        path = os.path.join(output_folder, filename)
+        entry = {'file': filename, 'sources': sources, 'bytes': len(content)}
+        if not os.path.exists(path):
+            _write_atomic(path, content)
+        for suffix, compress in compressors:
+            if not os.path.exists(path + suffix):
+                _write_atomic(path + suffix, compress(content))
+            entry[suffix.lstrip('.') + '_bytes'] = os.path.getsize(path + suffix)
+        manifest[name] = entry
+        logger.info(f"Built {filename} from {len(sources)} files: {entry}")
+
+    keep = {MANIFEST_NAME}
+    for entry in list(manifest.values()) + list(previous.entries.values()):
+        keep.update(entry['file'] + suffix for suffix in ('', '.gz', '.br'))
+    for filename in os.listdir(output_folder):
+        if filename not in keep:
+            os.unlink(os.path.join(output_folder, filename))
+
+    _write_atomic(os.path.join(output_folder, MANIFEST_NAME), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+class AssetManifest:
+    """
+    Lookup of fingerprinted bundle files.
+
+    Args:
+        folder (str): Asset folder holding the built files and manifest.json
+        entries (dict): Bundle name -> manifest entry (empty when nothing was built)
+    """
+
+    def __init__(self, folder, entries=None):
+        self.folder = folder
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, folder):
+        try:
+            with open(os.path.join(folder, MANIFEST_NAME)) as f:
+                return cls(folder, json.load(f))
+        except FileNotFoundError:
+            return cls(folder)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable asset manifest in {folder}: {e}")
+            return cls(folder)
+
+    def __bool__(self):
+        return bool(self.entries)
+
+    def built_file(self, name):
+        """Return the fingerprinted file name for a bundle, or None if it was not built."""
+        entry = self.entries.get(name)
+        return entry['file'] if entry is not None else None
+
+    def resolve(self, filename, accept_encodings=()):
+        """
+        Return (path, content encoding) for a built file, preferring a
+        pre-compressed copy the client accepts; (None, None) if there is no such file.
+
+        Any bundle file still in the folder is served, including ones kept
+        from the previous build.
+        """
+        if filename != os.path.basename(filename) or os.path.splitext(filename)[1] not in MIMETYPES:
+            return None, None
+        path = os.path.join(self.folder, filename)
+        if not os.path.isfile(path):
+            return None, None
+        for encoding, suffix in ENCODINGS:
+            if encoding in accept_encodings and os.path.isfile(path + suffix):
+                return path + suffix, encoding
+        return path, None
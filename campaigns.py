@@ -0,0 +1,209 @@
+"""
+Batch ingest of survey campaigns.
+
+A campaign is a ZIP archive or a server-side directory of dive videos. Only
+the list of videos is read up front (the ZIP central directory or a
+directory listing); each video is extracted when a worker picks it up, by
+streaming the archive member straight into the upload folder, so the archive
+is never unpacked in one go.
+
+A fixed number of workers pull videos from the campaign and run the
+analysis, and progress is reported as one aggregated stream of
+'campaign_progress' events followed by a 'campaign_complete' summary, rather
+than per-video step events.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+COPY_BUFFER_BYTES = 1024 * 1024
+
+
+def _is_video(name):
+    base = os.path.basename(name)
+    return not base.startswith('.') and os.path.splitext(base)[1].lower() in VIDEO_EXTENSIONS
+
+
+def zip_items(archive_path):
+    """List the videos in a ZIP archive without extracting anything."""
+    with zipfile.ZipFile(archive_path) as archive:
+        return [
+            {'name': os.path.basename(info.filename), 'size': info.file_size, 'member': info.filename}
+            for info in archive.infolist()
+            if not info.is_dir() and '__MACOSX/' not in info.filename and _is_video(info.filename)
+        ]
+
+
+def directory_items(folder):
+    """List the videos in a directory (not recursive), sorted by name."""
+    items = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_file() and _is_video(entry.name):
+                items.append({'name': entry.name, 'size': entry.stat().st_size, 'path': entry.path})
+    items.sort(key=lambda item: item['name'])
+    return items
+
+
+class Campaign:
+    """
+    A batch of videos analysed by a pool of workers.
+
+    Args:
+        campaign_id (str): Identifier used in progress events
+        items (list): Videos from zip_items() or directory_items()
+        process (callable): (campaign, item) -> analysis results dict; raises on failure
+        workers (int): Number of videos analysed concurrently
+        emit (callable): (event, data) -> None, e.g. socketio.emit
+        archive_path (str): ZIP archive the items come from
+        remove_archive (bool): Delete the archive when the campaign ends (for uploaded archives)
+        on_finish (callable): Called with no arguments once the campaign ends and the
+            archive is removed, e.g. to release the storage reserved for it
+    """
+
+    def __init__(self, campaign_id, items, process, workers=2, emit=None, archive_path=None, remove_archive=False,
+                 on_finish=None):
+        self.campaign_id = campaign_id
+        self.items = items
+        self.process = process
+        self.workers = max(1, min(workers, len(items) or 1))
+        self.emit = emit or (lambda event, data: None)
+        self.archive_path = archive_path
+        self.remove_archive = remove_archive
+        self.on_finish = on_finish
+        self.status = 'pending'
+        self.started = None
+        self.finished = None
+        self.completed = []
+        self.failed = []
+        self.in_progress = 0
+        self.bytes_processed = 0
+        self._next_index = 0
+        self._archive = None
+        self._lock = threading.Lock()
+
+    def extract(self, item, destination):
+        """Stream one archive member to `destination` and return the path."""
+        with self._archive.open(item['member']) as source, open(destination, 'wb') as target:
+            shutil.copyfileobj(source, target, COPY_BUFFER_BYTES)
+        return destination
+
+    def _next_item(self):
+        with self._lock:
+            if self._next_index >= len(self.items):
+                return None
+            item = self.items[self._next_index]
+            self._next_index += 1
+            self.in_progress += 1
+        self._emit_progress()
+        return item
+
+    def _worker(self):
+        while True:
+            item = self._next_item()
+            if item is None:
+                return
+            try:
+                results = self.process(self, item)
+                record = {
+                    'filename': item['name'],
+                    'session_id': results.get('session_id'),
+                    'location': results.get('location'),
+                    'fish_health_index': results.get('fish_health_index'),
+                }
+                with self._lock:
+                    self.completed.append(record)
+                    self.bytes_processed += item['size']
+            except Exception as e:
+                logger.error(f"Campaign {self.campaign_id}: {item['name']} failed: {e}")
+                with self._lock:
+                    self.failed.append({'filename': item['name'], 'error': str(e)})
+            finally:
+                with self._lock:
+                    self.in_progress -= 1
+            self._emit_progress()
+
+    def run(self):
+        """Analyse every item and return the campaign summary (blocks until done)."""
+        self.status = 'running'
+        self.started = time.time()
+        logger.info(f"Campaign {self.campaign_id} started: {len(self.items)} videos, {self.workers} workers")
+        try:
+            if self.archive_path:
+                self._archive = zipfile.ZipFile(self.archive_path)
+            threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if self._archive is not None:
+                self._archive.close()
+            if self.remove_archive and os.path.exists(self.archive_path):
+                os.remove(self.archive_path)
+            if self.on_finish is not None:
+                self.on_finish()
+        self.finished = time.time()
+        self.status = 'complete'
+        summary = self.summary()
+        logger.info(
+            f"Campaign {self.campaign_id} complete: {len(self.completed)} analysed, {len(self.failed)} failed "
+            f"in {summary['elapsed_seconds']:.1f}s"
+        )
+        self.emit('campaign_complete', summary)
+        return summary
+
+    def start(self):
+        """Run the campaign in a background thread."""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def progress(self):
+        """Return aggregated progress and throughput figures."""
+        with self._lock:
+            done = len(self.completed) + len(self.failed)
+            progress = {
+                'campaign_id': self.campaign_id,
+                'status': self.status,
+                'total': len(self.items),
+                'completed': len(self.completed),
+                'failed': len(self.failed),
+                'in_progress': self.in_progress,
+                'bytes_processed': self.bytes_processed,
+            }
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        rate = done / elapsed if elapsed > 0 else 0.0
+        progress['elapsed_seconds'] = round(elapsed, 1)
+        progress['videos_per_minute'] = round(rate * 60, 2)
+        progress['eta_seconds'] = round((len(self.items) - done) / rate, 1) if rate else None
+        return progress
+
+    def summary(self):
+        """Return progress plus per-video outcomes and per-site mean FHI."""
+        summary = self.progress()
+        with self._lock:
+            completed = list(self.completed)
+            failed = list(self.failed)
+        sites = {}
+        for record in completed:
+            site = sites.setdefault(record['location'], {'videos': 0, 'fhi_total': 0.0})
+            site['videos'] += 1
+            site['fhi_total'] += record['fish_health_index'] or 0.0
+        summary['sites'] = {
+            name: {'videos': site['videos'], 'mean_fhi': round(site['fhi_total'] / site['videos'], 3)}
+            for name, site in sites.items()
+        }
+        summary['sessions'] = completed
+        summary['failures'] = failed
+        return summary
+
+    def _emit_progress(self):
+        self.emit('campaign_progress', self.progress())
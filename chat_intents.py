@@ -0,0 +1,388 @@
+"""
+Intent routing for the chatbot.
+
+Questions are matched against a registry of intents before falling back to
+the OpenAI API. Each intent has:
+
+- keywords: words or phrases, compiled into one word-boundary regex;
+- patterns: extra regular expressions for phrasings keywords cannot express;
+- a handler that answers from the session's results, the site rollups and
+  the Cabo Pulmo baseline, without any network call.
+
+Intents are tried in registration order, so more specific intents are
+registered first. When nothing matches, misspelled words are corrected
+against the keyword vocabulary (difflib, cached per word) and matching is
+retried once. The router counts hits per intent and keeps recent latencies
+so hit rates and p50/p95 can be reported.
+"""
+
+import difflib
+import random
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from loop_monitor import percentile
+
+FALLBACK = 'fallback'
+
+
+class ChatContext:
+    """
+    What a handler may use to answer.
+
+    Args:
+        query (str): Lowercased question
+        results (dict): The session's analysis results (may be empty)
+        baseline (dict): Cabo Pulmo reference metrics
+        rollups (SiteRollups): Per-site aggregates (rollups.py)
+        site_names (list): Names of the monitored sites
+    """
+
+    def __init__(self, query, results, baseline, rollups=None, site_names=()):
+        self.query = query
+        self.results = results
+        self.location = results.get('location', 'this area')
+        self.baseline = baseline
+        self.rollups = rollups
+        self.site_names = list(site_names)
+
+    def site_summary(self, site=None):
+        """Rollup summary for a site (the session's site by default), or None without history."""
+        if self.rollups is None:
+            return None
+        return self.rollups.summary(site or self.results.get('location'))
+
+
+class Intent:
+    __slots__ = ('name', 'handler', 'regex')
+
+    def __init__(self, name, handler, regex):
+        self.name = name
+        self.handler = handler
+        self.regex = regex
+
+
+class IntentRouter:
+    """
+    Registry of chatbot intents with precompiled matchers and usage statistics.
+
+    Args:
+        fuzzy_cutoff (float): Minimum difflib similarity for a typo correction
+        latency_window (int): Recent latencies kept per intent for percentiles
+    """
+
+    def __init__(self, fuzzy_cutoff=0.8, latency_window=500):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.latency_window = latency_window
+        self._intents = []
+        self._vocabulary = ()
+        self._stats = {FALLBACK: self._new_stats()}
+        self._queries = 0
+        self._lock = threading.Lock()
+        self._correct_word = lru_cache(maxsize=4096)(self._closest_keyword)
+
+    def _new_stats(self):
+        return {'hits': 0, 'fuzzy_hits': 0, 'latencies_ms': deque(maxlen=self.latency_window)}
+
+    def register(self, name, handler, keywords=(), patterns=(), vocabulary=()):
+        """
+        Add an intent; earlier registrations win when several match.
+
+        Args:
+            keywords (tuple): Words or phrases matched on word boundaries
+            patterns (tuple): Extra regular expressions
+            vocabulary (tuple): Words that only appear in patterns but should still be typo-corrected
+        """
+        alternatives = [r'\b' + r'\s+'.join(map(re.escape, keyword.split())) + r'\b' for keyword in keywords]
+        alternatives.extend(patterns)
+        self._intents.append(Intent(name, handler, re.compile('|'.join(alternatives))))
+        self._stats[name] = self._new_stats()
+        words = {word for keyword in keywords for word in keyword.split() if len(word) >= 4}
+        words.update(vocabulary)
+        self._vocabulary = tuple(sorted(set(self._vocabulary) | words))
+        self._correct_word.cache_clear()
+
+    def intent(self, name, keywords=(), patterns=(), vocabulary=()):
+        """Decorator form of register()."""
+        def decorator(handler):
+            self.register(name, handler, keywords, patterns, vocabulary)
+            return handler
+        return decorator
+
+    def _closest_keyword(self, word):
+        matches = difflib.get_close_matches(word, self._vocabulary, n=1, cutoff=self.fuzzy_cutoff)
+        return matches[0] if matches else word
+
+    def _correct(self, query):
+        """Replace words that look like misspelled keywords."""
+        return re.sub(r'[a-z]{4,}', lambda match: self._correct_word(match.group(0)), query)
+
+    def match(self, query):
+        """Return (intent, fuzzy) for a lowercased query, or (None, False)."""
+        for intent in self._intents:
+            if intent.regex.search(query):
+                return intent, False
+        corrected = self._correct(query)
+        if corrected != query:
+            for intent in self._intents:
+                if intent.regex.search(corrected):
+                    return intent, True
+        return None, False
+
+    def route(self, context):
+        """
+        Answer a question locally if an intent matches.
+
+        Returns:
+            tuple: (intent name, response), or (None, None) when the caller should fall back
+        """
+        started = time.perf_counter()
+        intent, fuzzy = self.match(context.query)
+        response = intent.handler(context) if intent is not None else None
+        name = intent.name if intent is not None else FALLBACK
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._queries += 1
+            stats = self._stats[name]
+            stats['hits'] += 1
+            stats['fuzzy_hits'] += fuzzy
+            stats['latencies_ms'].append(elapsed_ms)
+        return (name, response) if intent is not None else (None, None)
+
+    def stats(self):
+        """Return per-intent hit counts, hit rates and routing latency percentiles."""
+        with self._lock:
+            queries = self._queries
+            snapshot = {name: (stats['hits'], stats['fuzzy_hits'], sorted(stats['latencies_ms']))
+                        for name, stats in self._stats.items()}
+        intents = {}
+        for name, (hits, fuzzy_hits, latencies) in snapshot.items():
+            intents[name] = {
+                'hits': hits,
+                'fuzzy_hits': fuzzy_hits,
+                'hit_rate': round(hits / queries, 4) if queries else 0.0,
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+            }
+        return {
+            'queries': queries,
+            'answered_locally': round(1 - intents[FALLBACK]['hit_rate'], 4) if queries else 0.0,
+            'intents': intents,
+        }
+
+
+# ----------------------------------------------------------------------
+# Handlers
+# ----------------------------------------------------------------------
+def _compare_word(value, reference):
+    if value == reference:
+        return 'level with'
+    return 'above' if value > reference else 'below'
+
+
+def _history_phrase(context, metric, unit):
+    """Sentence on a site's survey history for a metric, or '' without enough history."""
+    summary = context.site_summary()
+    if summary is None or summary['sessions'] < 2:
+        return ''
+    stats = summary['metrics'][metric]
+    if stats['count'] < 2:
+        return ''
+    phrase = f" Across {stats['count']} surveys at {context.location}, the average is {stats['mean']:.3g}{unit}"
+    if stats['trend_per_30_days'] is not None:
+        direction = 'rising' if stats['trend_per_30_days'] > 0 else 'falling'
+        phrase += f", {direction} by about {abs(stats['trend_per_30_days']):.3g}{unit} per month"
+    return phrase + '.'
+
+
+def fish_trend(context):
+    summary = context.site_summary()
+    current_density = context.results.get('fish_density', 150)
+    if summary is not None and summary['metrics']['fish_density']['count'] >= 2:
+        stats = summary['metrics']['fish_density']
+        historical_density = round(stats['mean'])
+        history = f" That average covers {stats['count']} surveys"
+        if stats['trend_per_30_days'] is not None:
+            direction = 'rising' if stats['trend_per_30_days'] > 0 else 'falling'
+            history += f", with density {direction} by about {abs(stats['trend_per_30_days']):.3g} fish/ha per month"
+        history += '.'
+    else:
+        historical_density = round(random.uniform(180, 220))
+        history = ''
+    trend_direction = "a decrease" if current_density < historical_density else "an increase"
+    percentage_change = abs(round(((current_density - historical_density) / historical_density) * 100))
+    return (f"Historically, fish density in {context.location} has averaged around {historical_density} fish/ha. "
+            f"The current assessment shows {current_density} fish/ha, {trend_direction} of {percentage_change}%.{history}")
+
+
+def temperature(context):
+    current_temp = round(random.uniform(25.5, 28.0), 1)
+    historical_temp = round(current_temp - random.uniform(1.0, 2.5), 1)
+    return (f"Our data shows a warming trend in {context.location}, with temperatures rising from an average of "
+            f"{historical_temp}°C to {current_temp}°C. This is driving 'tropicalization,' where warmer-water species "
+            f"increase and cooler-water species decline, impacting the local food web.")
+
+
+def baseline_comparison(context):
+    results, baseline = context.results, context.baseline
+    current_fhi = results.get('fish_health_index', 0.5)
+    response = (f"This site's Fish Health Index is {current_fhi:.2f}, compared to Cabo Pulmo's baseline of "
+                f"{baseline['fish_health_index']}. The primary difference is often predator biomass and enforcement levels.")
+    details = []
+    for metric, label, unit in (
+        ('fish_density', 'Fish density', ' fish/ha'),
+        ('invertebrate_cover', 'Invertebrate cover', '%'),
+        ('coral_bleaching', 'Coral bleaching', '%'),
+    ):
+        if metric in results:
+            value, reference = results[metric], baseline[metric]
+            details.append(f"{label} is {value}{unit}, {_compare_word(value, reference)} "
+                           f"the baseline of {reference}{unit}")
+    if details:
+        response += ' ' + '; '.join(details) + '.'
+    return response
+
+
+def bleaching(context):
+    value = context.results.get('coral_bleaching')
+    if value is None:
+        return "Coral bleaching is reported once an assessment has been analysed."
+    reference = context.baseline['coral_bleaching']
+    return (f"Coral bleaching in {context.location} affects {value}% of observed colonies, "
+            f"{_compare_word(value, reference)} the Cabo Pulmo baseline of {reference}%."
+            + _history_phrase(context, 'coral_bleaching', '%'))
+
+
+def invertebrate_cover(context):
+    value = context.results.get('invertebrate_cover')
+    if value is None:
+        return "Invertebrate cover is reported once an assessment has been analysed."
+    reference = context.baseline['invertebrate_cover']
+    return (f"Invertebrate cover in {context.location} is {value}%, "
+            f"{_compare_word(value, reference)} the Cabo Pulmo baseline of {reference}%."
+            + _history_phrase(context, 'invertebrate_cover', '%'))
+
+
+def algal_bloom(context):
+    level = context.results.get('algal_bloom_level')
+    if level is None:
+        return "Algal bloom risk is reported once an assessment has been analysed."
+    return (f"The algal bloom level in {context.location} is {level} "
+            f"(score {context.results.get('algal_bloom_score', 0):.2f} on a 0-1 scale).")
+
+
+def invasive_species(context):
+    count = context.results.get('invasive_species')
+    if count is None:
+        return "Invasive species screening is reported once an assessment has been analysed."
+    if count == 0:
+        return f"No invasive species were detected in the {context.location} assessment."
+    return f"{count} invasive species were detected in the {context.location} assessment."
+
+
+def site_ranking(context):
+    ranked = []
+    for name in context.site_names:
+        summary = context.site_summary(name)
+        if summary is not None and summary['metrics']['fish_health_index']['count']:
+            ranked.append((summary['metrics']['fish_health_index']['mean'], name, summary['sessions']))
+    if not ranked:
+        return "There are not enough stored assessments yet to rank the monitored sites."
+    ranked.sort(reverse=True)
+    lines = [f"{index}. {name}: mean FHI {fhi:.2f} ({sessions} surveys)"
+             for index, (fhi, name, sessions) in enumerate(ranked, start=1)]
+    return "Monitored sites ranked by mean Fish Health Index: " + '; '.join(lines) + '.'
+
+
+def survey_details(context):
+    results = context.results
+    if not results:
+        return "Survey details are available once a video has been analysed."
+    coordinates = results.get('coordinates', {})
+    return (f"This survey was recorded at {context.location} "
+            f"({coordinates.get('lat', 0):.4f}, {coordinates.get('lng', 0):.4f}) on {results.get('date', 'an unknown date')} "
+            f"by {results.get('diver', 'an unknown diver')}, at a depth of {results.get('depth_range', 'unknown')}.")
+
+
+def health_summary(context):
+    results = context.results
+    if 'fish_health_index' not in results:
+        return "Upload a dive video to get a Fish Health Index and the other ecosystem metrics."
+    fhi = results['fish_health_index']
+    status = 'poor' if fhi < 0.4 else ('moderate' if fhi < 0.7 else 'good')
+    return (f"{context.location} has a Fish Health Index of {fhi:.2f} ({status}), with {results.get('fish_density')} fish/ha, "
+            f"{results.get('invertebrate_cover')}% invertebrate cover, {results.get('coral_bleaching')}% coral bleaching "
+            f"and a {results.get('algal_bloom_level', 'unknown')} algal bloom level."
+            + _history_phrase(context, 'fish_health_index', ''))
+
+
+def help_message(context):
+    return ("I can answer questions about this assessment: fish trends, the Fish Health Index, coral bleaching, "
+            "invertebrate cover, algal blooms, invasive species, temperature, survey details, how the site compares "
+            "with the Cabo Pulmo baseline, and how the monitored sites rank.")
+
+
+# Words that tie a question to the assessment being viewed rather than to a topic in general
+_THIS_ASSESSMENT = (r'(this|here|there|current|currently|our|my|site|reef|area|survey|dive|video|assessment|'
+                    r'results?|levels?|how much|how many|percent\w*|detected|found)')
+
+
+def _about_this_assessment(topic):
+    """Pattern matching a topic together with a word referring to the current assessment."""
+    return rf'^(?=.*\b{topic}\b)(?=.*\b{_THIS_ASSESSMENT}\b)'
+
+
+def build_router():
+    """
+    Return the router with the built-in intents, most specific first.
+
+    Metric topics (bleaching, the FHI, algal blooms, ...) only match together
+    with a word tying the question to the current assessment, so general
+    ecology questions still reach OpenAI. The Cabo Pulmo baseline, the app's
+    own reference, is answered locally on its own.
+    """
+    router = IntentRouter()
+    router.register('site_ranking', site_ranking,
+                    keywords=('site ranking', 'rank the sites', 'best site', 'worst site', 'healthiest site',
+                              'all sites ranked'),
+                    patterns=(r'^(?=.*\bwhich (monitored )?sites?\b)(?=.*\b(best|worst|healthiest|healthy|highest|lowest)\b)',))
+    # As before the router: any question naming Cabo Pulmo or the baseline
+    router.register('baseline_comparison', baseline_comparison,
+                    keywords=('baseline', 'cabo pulmo'),
+                    patterns=(r'\bcompar\w* (this|the current|our) (site|area|reef|assessment)\b',),
+                    vocabulary=('compare',))
+    # Same condition as before the router: temperature together with fish, biomass or a correlation
+    router.register('temperature', temperature,
+                    patterns=(r'^(?=.*\btemperatures?\b)(?=.*\b(correlat\w*|biomass|fish)\b)',),
+                    vocabulary=('temperature', 'correlates', 'correlate', 'biomass'))
+    router.register('bleaching', bleaching,
+                    patterns=(_about_this_assessment(r'(bleaching|bleached|coral health)'),),
+                    vocabulary=('bleaching', 'bleached'))
+    router.register('invertebrate_cover', invertebrate_cover,
+                    patterns=(_about_this_assessment(r'(invertebrates?|benthic cover)'),),
+                    vocabulary=('invertebrate', 'invertebrates', 'benthic'))
+    router.register('algal_bloom', algal_bloom,
+                    patterns=(_about_this_assessment(r'(algal blooms?|algae blooms?|red tide)'),),
+                    vocabulary=('algal', 'algae', 'bloom', 'blooms'))
+    router.register('invasive_species', invasive_species,
+                    patterns=(_about_this_assessment(r'(invasive|lionfish)'),),
+                    vocabulary=('invasive', 'lionfish'))
+    router.register('fish_trend', fish_trend,
+                    keywords=('fish trend', 'fish trends', 'fish density'),
+                    patterns=(r'^(?=.*\bfish\b)(?=.*\btrends?\b)',))
+    router.register('survey_details', survey_details,
+                    keywords=('survey depth', 'dive depth', 'survey date', 'survey location', 'who was the diver'),
+                    patterns=(r'\b(when|where) was (this|the) (survey|dive|video)\b',))
+    router.register('health_summary', health_summary,
+                    keywords=('overall health', 'summarize this', 'summarise this', 'summary of this',
+                              'assessment results', 'these results'),
+                    patterns=(_about_this_assessment(r'(fhi|(fish )?health index)'),
+                              r'\bhow healthy is (this|the) (site|reef|area)\b'),
+                    vocabulary=('health', 'index'))
+    router.register('help', help_message,
+                    keywords=('what can you do', 'what can you answer'),
+                    patterns=(r'^\s*(help|hi|hello|hey|hola)\s*[!.?]*\s*$',))
+    return router
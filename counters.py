@@ -0,0 +1,135 @@
+"""
+Usage counters for cited sources.
+
+Counts are accumulated in memory under a lock, so concurrent chatbot
+requests never lose increments, and written to disk in batches by a
+background flusher: every `flush_interval` seconds, or sooner once
+`max_pending` increments are waiting. Totals are reloaded on startup.
+
+Each group (papers, databases) keeps its entries ordered by count. An
+increment moves the entry up past the entries it now outnumbers, which is
+usually zero or one swap, and the read-only view handed to the page is
+rebuilt only after a change, so serving the citations page does not sort.
+"""
+
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class UsageCounters:
+    """
+    Grouped usage counters with batched persistence and pre-sorted views.
+
+    Args:
+        groups (dict): group -> list of {'citation': text, 'used': initial count}
+        path (str): JSON file the totals are persisted to (None keeps them in memory)
+        flush_interval (float): Seconds between background flushes
+        max_pending (int): Flush early once this many increments are unsaved
+    """
+
+    def __init__(self, groups, path=None, flush_interval=30.0, max_pending=100):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = 0
+        self._thread = None
+        saved = self._load()
+        self._entries = {}   # group -> list of [key, count], highest count first
+        self._position = {}  # (group, key) -> index in the group's list
+        self._views = {}     # group -> cached tuple of {'citation', 'used'} dicts
+        for group, items in groups.items():
+            entries = [[item['citation'], saved.get(group, {}).get(item['citation'], item.get('used', 0))]
+                       for item in items]
+            # Stable sort keeps catalogue order among equal counts
+            entries.sort(key=lambda entry: -entry[1])
+            self._entries[group] = entries
+            for index, entry in enumerate(entries):
+                self._position[(group, entry[0])] = index
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable usage counters {self.path}: {e}")
+            return {}
+
+    def increment(self, group, key, amount=1):
+        """Add `amount` uses to an entry, keeping its group ordered by count."""
+        with self._lock:
+            entries = self._entries[group]
+            index = self._position[(group, key)]
+            entries[index][1] += amount
+            # Move up past entries with a lower count (ties keep their order)
+            while index > 0 and entries[index - 1][1] < entries[index][1]:
+                entries[index - 1], entries[index] = entries[index], entries[index - 1]
+                self._position[(group, entries[index][0])] = index
+                index -= 1
+            self._position[(group, key)] = index
+            self._views.pop(group, None)
+            self._pending += amount
+            if self._pending >= self.max_pending:
+                self._wake.set()
+
+    def sorted_view(self, group):
+        """Return the group's entries, most used first, as {'citation', 'used'} dicts."""
+        view = self._views.get(group)
+        if view is None:
+            with self._lock:
+                view = tuple({'citation': key, 'used': count} for key, count in self._entries[group])
+                self._views[group] = view
+        return view
+
+    def count(self, group, key):
+        with self._lock:
+            return self._entries[group][self._position[(group, key)]][1]
+
+    def flush(self):
+        """Write the totals to disk if anything changed since the last flush."""
+        with self._lock:
+            if not self._pending or not self.path:
+                return False
+            snapshot = {group: {key: count for key, count in entries} for group, entries in self._entries.items()}
+            pending = self._pending
+            self._pending = 0
+        folder = os.path.dirname(self.path) or '.'
+        tmp_path = None
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not persist usage counters: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            with self._lock:
+                self._pending += pending
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start the background flusher (idempotent); a final flush also runs at exit."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
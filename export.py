@@ -0,0 +1,189 @@
+"""
+Streaming bulk export of stored analysis results.
+
+Sessions are read from the session store one file at a time, filtered, and
+flattened into rows with a fixed set of columns. Each format is a generator
+of output chunks that a Flask response streams as they are produced, so
+memory use does not grow with the number of sessions:
+
+- CSV: one line per session, flushed in chunks of roughly CHUNK_BYTES;
+- GeoJSON: a FeatureCollection of Point features, written feature by feature;
+- Parquet: written with pyarrow, one row group per ROW_GROUP_SIZE sessions,
+  each flushed as soon as it is complete (pyarrow is imported on first use).
+
+Rows come out in store order, not sorted; sorting would require holding
+the whole dataset.
+"""
+
+import csv
+import io
+import json
+
+CHUNK_BYTES = 64 * 1024
+ROW_GROUP_SIZE = 1000
+
+# Column name -> type, in output order
+COLUMNS = {
+    'session_id': str,
+    'date': str,
+    'location': str,
+    'location_source': str,
+    'lat': float,
+    'lng': float,
+    'fish_health_index': float,
+    'fish_density': int,
+    'invertebrate_cover': int,
+    'coral_bleaching': int,
+    'invasive_species': int,
+    'algal_bloom_score': float,
+    'algal_bloom_level': str,
+    'depth_range': str,
+    'diver': str,
+    'video_filename': str,
+}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'geojson': ('application/geo+json', 'geojson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def flatten(results):
+    """Return a session's results as a row dict over COLUMNS (missing values are None)."""
+    coordinates = results.get('coordinates') or {}
+    row = {}
+    for name, kind in COLUMNS.items():
+        value = coordinates.get(name) if name in ('lat', 'lng') else results.get(name)
+        try:
+            row[name] = kind(value) if value is not None else None
+        except (TypeError, ValueError):
+            row[name] = None
+    return row
+
+
+class ExportFilter:
+    """
+    Session filter for exports.
+
+    Args:
+        site (str): Only sessions at this site (canonical name)
+        date_from (str): Only sessions on or after this ISO date
+        date_to (str): Only sessions on or before this ISO date
+        min_fhi (float): Only sessions with at least this Fish Health Index
+        max_fhi (float): Only sessions with at most this Fish Health Index
+    """
+
+    def __init__(self, site=None, date_from=None, date_to=None, min_fhi=None, max_fhi=None):
+        self.site = site
+        self.date_from = date_from
+        self.date_to = date_to
+        self.min_fhi = min_fhi
+        self.max_fhi = max_fhi
+
+    def matches(self, row):
+        if self.site is not None and row['location'] != self.site:
+            return False
+        # ISO dates compare correctly as strings
+        if self.date_from is not None and (row['date'] is None or row['date'] < self.date_from):
+            return False
+        if self.date_to is not None and (row['date'] is None or row['date'] > self.date_to):
+            return False
+        fhi = row['fish_health_index']
+        if self.min_fhi is not None and (fhi is None or fhi < self.min_fhi):
+            return False
+        if self.max_fhi is not None and (fhi is None or fhi > self.max_fhi):
+            return False
+        return True
+
+
+def export_rows(results_iter, export_filter=None):
+    """Yield flattened rows for the sessions that pass the filter."""
+    for results in results_iter:
+        row = flatten(results)
+        if export_filter is None or export_filter.matches(row):
+            yield row
+
+
+def iter_csv(rows):
+    """Yield CSV text in chunks of about CHUNK_BYTES."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(COLUMNS))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_geojson(rows):
+    """Yield a GeoJSON FeatureCollection one feature at a time (sessions without coordinates are skipped)."""
+    yield '{"type": "FeatureCollection", "features": ['
+    separator = ''
+    for row in rows:
+        if row['lat'] is None or row['lng'] is None:
+            continue
+        feature = {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [row['lng'], row['lat']]},
+            'properties': {name: value for name, value in row.items() if name not in ('lat', 'lng')},
+        }
+        yield separator + json.dumps(feature)
+        separator = ',\n'
+    yield ']}\n'
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each row group."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(rows, row_group_size=ROW_GROUP_SIZE):
+    """Yield a Parquet file in pieces, one row group at a time."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {str: pa.string(), float: pa.float64(), int: pa.int64()}
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in COLUMNS.items()])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    batch = []
+
+    def write_batch():
+        columns = {name: [row[name] for row in batch] for name in COLUMNS}
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        batch.clear()
+
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                write_batch()
+                yield sink.drain()
+        if batch:
+            write_batch()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,209 @@
+"""
+Non-blocking logging for the eventlet server.
+
+Request and analysis green threads only put records on an in-memory queue;
+a listener on a real OS thread does the formatting and the disk/console
+writes, so a slow disk never stalls the event loop.
+
+Features:
+- size- and time-based rotation of the log file (whichever comes first)
+- optional JSON records carrying session_id, endpoint and latency_ms
+- 1-in-N sampling of high-volume messages tagged with ``extra={'sample': key}``
+"""
+
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+from eventlet import patcher
+
+_real_threading = patcher.original('threading')
+_real_queue = patcher.original('queue')
+
+# Session bound to the current green thread (analysis jobs run outside a request)
+current_session_id = contextvars.ContextVar('current_session_id', default=None)
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """Rotate at a time boundary or when the file exceeds max_bytes, whichever comes first."""
+
+    def __init__(self, filename, max_bytes=0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        # Size rollovers can happen several times per period, so backups are
+        # stamped to the second and de-duplicated instead of overwritten
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        stamp = time.strftime('%Y-%m-%d_%H-%M-%S')
+        destination = self.rotation_filename(f"{self.baseFilename}.{stamp}")
+        counter = 1
+        while os.path.exists(destination):
+            destination = self.rotation_filename(f"{self.baseFilename}.{stamp}.{counter}")
+            counter += 1
+        self.rotate(self.baseFilename, destination)
+        if self.backupCount > 0:
+            prefix = os.path.basename(self.baseFilename) + '.'
+            directory = os.path.dirname(self.baseFilename)
+            backups = sorted(
+                (os.path.join(directory, name) for name in os.listdir(directory) if name.startswith(prefix)),
+                key=os.path.getmtime
+            )
+            for old_backup in backups[:-self.backupCount]:
+                os.remove(old_backup)
+        if not self.delay:
+            self.stream = self._open()
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including any extra fields."""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != 'sample' and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exception'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Attach session_id, endpoint and latency_ms to records emitted while
+    handling a request or running an analysis job.
+    """
+
+    def filter(self, record):
+        from flask import g, has_request_context, request
+        if has_request_context():
+            if getattr(record, 'session_id', None) is None:
+                record.session_id = g.get('session_id')
+            record.endpoint = request.endpoint
+            started = g.get('request_started')
+            if started is not None and getattr(record, 'latency_ms', None) is None:
+                record.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        elif getattr(record, 'session_id', None) is None:
+            record.session_id = current_session_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep 1 in N records tagged with ``extra={'sample': key}``.
+
+    Args:
+        rates (dict): Per-key N; keys not listed use default_rate
+        default_rate (int): N for tagged records without an explicit rate
+    """
+
+    def __init__(self, rates=None, default_rate=1):
+        super().__init__()
+        self.rates = rates or {}
+        self.default_rate = max(1, default_rate)
+        self._counts = defaultdict(int)
+
+    def filter(self, record):
+        key = getattr(record, 'sample', None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(key, self.default_rate)
+        if rate <= 1:
+            return True
+        # Keep the first record of every window of `rate`
+        count = self._counts[key]
+        self._counts[key] = count + 1
+        return count % rate == 0
+
+
+class RealThreadQueueListener(QueueListener):
+    """QueueListener whose worker is an OS thread even under eventlet monkey patching."""
+
+    def start(self):
+        self._thread = _real_threading.Thread(target=self._monitor, name='log-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        # Safe to call twice (explicitly and again from atexit)
+        if self._thread is not None:
+            super().stop()
+
+
+def parse_sample_rates(spec):
+    """Parse 'key=N,key=N' into a dict of ints."""
+    rates = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            key, value = item.split('=', 1)
+            rates[key.strip()] = int(value)
+    return rates
+
+
+def configure_logging(level='INFO', log_file='reef_assessment.log', json_format=False,
+                      max_bytes=10 * 1024 * 1024, backup_count=5, rotate_when='midnight',
+                      sample_rates=None, default_sample_rate=1):
+    """
+    Route all logging through a queue drained by a background OS thread.
+
+    Returns the started listener; it is stopped (and the queue flushed) at exit.
+    """
+    formatter = JsonFormatter() if json_format else logging.Formatter(DEFAULT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handlers.append(SizedTimedRotatingFileHandler(
+            log_file,
+            max_bytes=max_bytes,
+            when=rotate_when,
+            backupCount=backup_count,
+            encoding='utf-8'
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = _real_queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # Filters run on the calling green thread, where request context is available
+    queue_handler.addFilter(SamplingFilter(sample_rates, default_sample_rate))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = RealThreadQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
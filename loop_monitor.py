@@ -0,0 +1,214 @@
+"""
+Event-loop lag monitor for the eventlet hub.
+
+The application runs every request, Socket.IO handler and analysis job as a
+green thread on a single OS thread. Any call that blocks without yielding
+(synchronous OpenAI requests, ReportLab builds, matplotlib rendering, disk
+writes) stalls all of them, which shows up as frozen websockets.
+
+This module measures that scheduling delay and identifies the blocking code:
+
+- a green sampler sleeps for a fixed interval and records how late the hub
+  woke it up (the loop lag);
+- a watchdog running on a real OS thread notices when the sampler has not
+  checked in for longer than the stall threshold and captures the stack of
+  the hub thread *while it is still blocked*, attributing it to the route or
+  handler found in that stack;
+- optionally, eventlet's own blocking detector can be switched on for debug
+  sessions (it interrupts offending code with a RuntimeError, so it must
+  never be enabled in production).
+"""
+
+import datetime
+import inspect
+import logging
+import sys
+import time
+import traceback
+from collections import deque
+
+import eventlet
+from eventlet import patcher
+
+# The watchdog must run on a real OS thread, otherwise it would be blocked
+# together with the hub it is supposed to observe.
+_real_threading = patcher.original('threading')
+_real_time = patcher.original('time')
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_values, pct):
+    """Return the pct-th percentile (0-100) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = (len(sorted_values) - 1) * (pct / 100.0)
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = index - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def enable_blocking_detection(resolution=1.0):
+    """
+    Turn on eventlet's SIGALRM based blocking detector (debug mode only).
+
+    Code that holds the hub for longer than `resolution` seconds is
+    interrupted with a RuntimeError carrying the offending frame, so the
+    failing route shows up with a full traceback in the application log.
+    """
+    from eventlet import debug
+    debug.hub_blocking_detection(True, resolution=resolution)
+    logger.warning(f"Eventlet blocking detection enabled (resolution={resolution}s) - do not use in production")
+
+
+class LoopLagMonitor:
+    """
+    Sample eventlet hub scheduling delay and record stalls.
+
+    Args:
+        interval (float): Seconds between sampler wake-ups
+        stall_threshold (float): Seconds without a sampler check-in after which
+            the hub is considered blocked and its stack is captured
+        max_samples (int): Number of recent lag samples kept for percentiles
+        max_stalls (int): Number of recent stall reports kept
+        handler_resolver (callable): Returns a mapping of handler name to
+            function, used to attribute a stall to a route or Socket.IO handler
+    """
+
+    def __init__(self, interval=0.1, stall_threshold=0.5, max_samples=3000,
+                 max_stalls=50, handler_resolver=None):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.handler_resolver = handler_resolver
+        self._samples = deque(maxlen=max_samples)
+        self._stalls = deque(maxlen=max_stalls)
+        self._pending_stall = None
+        self._lock = _real_threading.Lock()
+        self._heartbeat = None
+        self._hub_thread_id = None
+        self._handler_codes = None
+        self._running = False
+        self._total_samples = 0
+        self._total_stalls = 0
+        self._started_at = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Start the green sampler and the OS-thread watchdog.
+
+        Must be called from the thread that runs the eventlet hub.
+        """
+        if self._running:
+            return
+        self._running = True
+        self._hub_thread_id = _real_threading.get_ident()
+        self._started_at = datetime.datetime.now()
+        eventlet.spawn(self._sample_loop)
+        watchdog = _real_threading.Thread(target=self._watchdog_loop, name='loop-lag-watchdog')
+        watchdog.daemon = True
+        watchdog.start()
+        logger.info(f"Loop lag monitor started (interval={self.interval}s, stall threshold={self.stall_threshold}s)")
+
+    def stop(self):
+        self._running = False
+
+    def _sample_loop(self):
+        """Green thread: measure how late the hub resumes us after each sleep."""
+        while self._running:
+            started = time.monotonic()
+            self._heartbeat = started
+            eventlet.sleep(self.interval)
+            resumed = time.monotonic()
+            lag = max(0.0, resumed - started - self.interval)
+            with self._lock:
+                self._samples.append(lag)
+                self._total_samples += 1
+                finished_stall = self._pending_stall
+                self._pending_stall = None
+            self._heartbeat = resumed
+            if finished_stall is not None:
+                # Logging happens here, on the hub thread, once the block is over
+                finished_stall['blocked_for_s'] = round(lag + self.interval, 3)
+                logger.warning(
+                    f"Event loop blocked for {finished_stall['blocked_for_s']}s "
+                    f"in {finished_stall['handler'] or 'unknown handler'}:\n"
+                    + ''.join(finished_stall['stack'])
+                )
+
+    def _watchdog_loop(self):
+        """Real thread: capture the hub thread's stack while it is blocked."""
+        poll = max(self.interval / 2.0, 0.02)
+        reported_heartbeat = None
+        while self._running:
+            _real_time.sleep(poll)
+            heartbeat = self._heartbeat
+            if heartbeat is None or heartbeat == reported_heartbeat:
+                continue
+            if time.monotonic() - heartbeat - self.interval < self.stall_threshold:
+                continue
+            frame = sys._current_frames().get(self._hub_thread_id)
+            if frame is None:
+                continue
+            reported_heartbeat = heartbeat
+            stall = {
+                'detected_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'blocked_for_s': None,
+                'handler': self._resolve_handler(frame),
+                'stack': traceback.format_stack(frame),
+            }
+            del frame
+            with self._lock:
+                self._stalls.append(stall)
+                self._pending_stall = stall
+                self._total_stalls += 1
+
+    def _resolve_handler(self, frame):
+        """Return the name of the innermost registered handler found in the stack."""
+        if self._handler_codes is None:
+            self._handler_codes = {}
+            if self.handler_resolver is not None:
+                try:
+                    for name, func in self.handler_resolver().items():
+                        code = getattr(inspect.unwrap(func), '__code__', None)
+                        if code is not None:
+                            self._handler_codes[code] = name
+                except Exception:
+                    # Attribution is best effort; the raw stack is still recorded
+                    pass
+        while frame is not None:
+            name = self._handler_codes.get(frame.f_code)
+            if name:
+                return name
+            frame = frame.f_back
+        return None
+
+    def snapshot(self):
+        """Return lag percentiles (in milliseconds) and recent stalls."""
+        with self._lock:
+            samples = sorted(self._samples)
+            stalls = list(self._stalls)
+            total_samples = self._total_samples
+            total_stalls = self._total_stalls
+        to_ms = lambda seconds: round(seconds * 1000, 2)
+        return {
+            'enabled': self._running,
+            'started_at': self._started_at.isoformat(timespec='seconds') if self._started_at else None,
+            'interval_ms': to_ms(self.interval),
+            'stall_threshold_ms': to_ms(self.stall_threshold),
+            'samples': len(samples),
+            'total_samples': total_samples,
+            'total_stalls': total_stalls,
+            'lag_ms': {
+                'mean': to_ms(sum(samples) / len(samples)) if samples else 0.0,
+                'p50': to_ms(percentile(samples, 50)),
+                'p90': to_ms(percentile(samples, 90)),
+                'p95': to_ms(percentile(samples, 95)),
+                'p99': to_ms(percentile(samples, 99)),
+                'max': to_ms(samples[-1]) if samples else 0.0,
+            },
+            'recent_stalls': stalls[::-1],
+        }
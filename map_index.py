@@ -0,0 +1,146 @@
+"""
+Server-side clustering of survey points for the interactive map.
+
+Session coordinates are indexed in a quadtree of Web Mercator tiles: for
+every zoom level the index keeps running aggregates (count, coordinate sums,
+FHI sum) per grid cell, so inserting a point costs one update per level and
+answering a map view never touches individual points.
+
+A map request (bounding box + zoom) is split into the tiles covering the
+view. Each tile's clusters are the non-empty cells `cluster_offset` levels
+deeper (8x8 cells per tile by default) and are cached per tile; inserting a
+point only invalidates the tiles that contain it.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+MAX_LATITUDE = 85.05112878
+
+
+def _mercator_fraction(lat, lng):
+    """Project a position to Web Mercator coordinates in [0, 1)."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = (lng + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+
+class SurveyPointIndex:
+    """
+    Multi-resolution aggregate index over survey positions.
+
+    Args:
+        max_zoom (int): Deepest map zoom served; deeper requests reuse it
+        cluster_offset (int): Cluster cells per tile side = 2 ** cluster_offset
+        cache_tiles (int): Number of tile results kept in the LRU cache
+        max_tiles_per_query (int): Upper bound on tiles scanned for one view
+    """
+
+    def __init__(self, max_zoom=14, cluster_offset=3, cache_tiles=4096, max_tiles_per_query=256):
+        self.max_zoom = max_zoom
+        self.cluster_offset = cluster_offset
+        self.cache_tiles = cache_tiles
+        self.max_tiles_per_query = max_tiles_per_query
+        # levels[level][(x, y)] = [count, sum_lat, sum_lng, sum_fhi, fhi_count, session_id]
+        self._levels = [dict() for _ in range(max_zoom + cluster_offset + 1)]
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._total = 0
+
+    def __len__(self):
+        return self._total
+
+    def add(self, lat, lng, fish_health_index=None, session_id=None):
+        """Index one survey position."""
+        fx, fy = _mercator_fraction(lat, lng)
+        with self._lock:
+            for level, cells in enumerate(self._levels):
+                scale = 1 << level
+                key = (int(fx * scale), int(fy * scale))
+                cell = cells.get(key)
+                if cell is None:
+                    cell = cells[key] = [0, 0.0, 0.0, 0.0, 0, None]
+                cell[0] += 1
+                cell[1] += lat
+                cell[2] += lng
+                if fish_health_index is not None:
+                    cell[3] += fish_health_index
+                    cell[4] += 1
+                cell[5] = session_id
+                # A cell at level z is the tile (z, x, y): drop its cached clusters
+                if level <= self.max_zoom:
+                    self._cache.pop((level,) + key, None)
+            self._total += 1
+
+    def add_results(self, results):
+        """Index a session's analysis results if they carry coordinates."""
+        coordinates = results.get('coordinates') or {}
+        if 'lat' not in coordinates or 'lng' not in coordinates:
+            return False
+        self.add(coordinates['lat'], coordinates['lng'], results.get('fish_health_index'), results.get('session_id'))
+        return True
+
+    def tile_clusters(self, zoom, x, y):
+        """Return the clusters inside one tile, served from the tile cache when possible."""
+        key = (zoom, x, y)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            cells = self._levels[zoom + self.cluster_offset]
+            span = 1 << self.cluster_offset
+            clusters = []
+            if (x, y) in self._levels[zoom]:
+                for cx in range(x * span, (x + 1) * span):
+                    for cy in range(y * span, (y + 1) * span):
+                        cell = cells.get((cx, cy))
+                        if cell is None:
+                            continue
+                        count, sum_lat, sum_lng, sum_fhi, fhi_count, session_id = cell
+                        cluster = {
+                            'lat': round(sum_lat / count, 6),
+                            'lng': round(sum_lng / count, 6),
+                            'count': count,
+                            'mean_fhi': round(sum_fhi / fhi_count, 3) if fhi_count else None,
+                        }
+                        if count == 1:
+                            cluster['session_id'] = session_id
+                        clusters.append(cluster)
+            self._cache[key] = clusters
+            if len(self._cache) > self.cache_tiles:
+                self._cache.popitem(last=False)
+            return clusters
+
+    def query(self, west, south, east, north, zoom):
+        """
+        Return clusters covering a bounding box at a map zoom level.
+
+        Raises:
+            ValueError: If the view would span more than max_tiles_per_query tiles
+        """
+        zoom = max(0, min(int(zoom), self.max_zoom))
+        scale = 1 << zoom
+        x_min, y_min = _mercator_fraction(north, west)
+        x_max, y_max = _mercator_fraction(south, east)
+        tx_min, tx_max = int(x_min * scale), int(x_max * scale)
+        ty_min, ty_max = int(y_min * scale), int(y_max * scale)
+        x_ranges = [(tx_min, tx_max)] if tx_min <= tx_max else [(tx_min, scale - 1), (0, tx_max)]  # antimeridian
+        # Count before enumerating: a world view at max zoom is hundreds of millions of tiles
+        tile_count = sum(hi - lo + 1 for lo, hi in x_ranges) * max(0, ty_max - ty_min + 1)
+        if tile_count > self.max_tiles_per_query:
+            raise ValueError(f"View spans {tile_count} tiles at zoom {zoom}; zoom in or shrink the bounding box")
+        clusters = []
+        for lo, hi in x_ranges:
+            for tx in range(lo, hi + 1):
+                for ty in range(ty_min, ty_max + 1):
+                    clusters.extend(self.tile_clusters(zoom, tx, ty))
+        return {
+            'zoom': zoom,
+            'tiles': tile_count,
+            'points': sum(cluster['count'] for cluster in clusters),
+            'clusters': clusters,
+        }
@@ -0,0 +1,237 @@
+"""
+On-demand per-request profiling.
+
+A single request can be run under one of two profilers:
+
+- ``sample`` (default): a real OS thread samples the stack of the hub thread
+  every few milliseconds and writes collapsed stacks (``frame;frame;frame N``)
+  that can be fed straight into flamegraph.pl or speedscope. Samples taken
+  while the profiled request is switched out (waiting on I/O) are recorded
+  under a ``[waiting]`` root so off-CPU time shows up in the graph too.
+- ``cprofile``: deterministic profiling with cProfile, saved as a ``.prof``
+  file for pstats/snakeviz. Because eventlet runs all green threads on one OS
+  thread, this also includes any green threads scheduled during the request.
+
+Profiles are stored in a bounded directory; the oldest are pruned first.
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from eventlet import patcher
+
+_real_threading = patcher.original('threading')
+_real_time = patcher.original('time')
+
+PROFILE_MODES = ('sample', 'cprofile')
+PROFILE_EXTENSIONS = {'sample': '.collapsed', 'cprofile': '.prof'}
+
+# Only one request is profiled at a time to keep overhead bounded
+_profile_lock = _real_threading.Lock()
+
+
+def admin_token_valid(supplied, expected):
+    """Constant-time admin token check; profiling is off when no token is configured."""
+    if not expected or not supplied:
+        return False
+    return hmac.compare_digest(str(supplied), str(expected))
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Sample the stack of one OS thread from a background OS thread.
+
+    Args:
+        thread_id (int): Real thread id to sample (the eventlet hub thread)
+        anchor_frame (frame): A frame that stays live for the whole request;
+            samples that do not contain it are counted as waiting time
+        interval (float): Seconds between samples
+    """
+
+    def __init__(self, thread_id, anchor_frame=None, interval=0.005):
+        self.thread_id = thread_id
+        self.anchor_frame = anchor_frame
+        self.interval = interval
+        self.stacks = Counter()
+        self.sample_count = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = _real_threading.Thread(target=self._run, name='request-profiler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        labels = {}
+        while self._running:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                in_request = self.anchor_frame is None
+                while frame is not None:
+                    if frame is self.anchor_frame:
+                        in_request = True
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                del frame
+                stack.reverse()
+                if not in_request:
+                    stack.insert(0, '[waiting]')
+                self.stacks[';'.join(stack)] += 1
+                self.sample_count += 1
+            _real_time.sleep(self.interval)
+
+    def collapsed(self):
+        """Return the samples in collapsed-stack format, heaviest first."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Profile a single request with the selected mode."""
+
+    def __init__(self, mode, thread_id, anchor_frame=None, interval=0.005):
+        self.mode = mode
+        self.started = None
+        self.duration = None
+        if mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+        else:
+            self._profiler = SamplingProfiler(thread_id, anchor_frame, interval)
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.mode == 'cprofile':
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+
+    def stop(self):
+        if self.mode == 'cprofile':
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+        self.duration = time.perf_counter() - self.started
+
+    def write(self, path):
+        if self.mode == 'cprofile':
+            self._profiler.dump_stats(path)
+        else:
+            with open(path, 'w') as f:
+                f.write(self._profiler.collapsed())
+
+
+class ProfileStore:
+    """
+    Bounded on-disk directory of request profiles.
+
+    Args:
+        folder (str): Directory the profiles are written to
+        max_files (int): Maximum number of profiles kept
+        max_bytes (int): Maximum total size of stored profiles
+    """
+
+    def __init__(self, folder, max_files=50, max_bytes=50 * 1024 * 1024):
+        self.folder = folder
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+
+    def save(self, profile, endpoint, path, status_code):
+        """Write a finished profile plus its metadata sidecar and prune old ones."""
+        os.makedirs(self.folder, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        safe_endpoint = ''.join(c if c.isalnum() else '_' for c in (endpoint or 'unknown'))
+        name = f"{stamp}_{safe_endpoint}_{os.urandom(3).hex()}{PROFILE_EXTENSIONS[profile.mode]}"
+        profile.write(os.path.join(self.folder, name))
+        metadata = {
+            'name': name,
+            'mode': profile.mode,
+            'endpoint': endpoint,
+            'path': path,
+            'status_code': status_code,
+            'duration_ms': round(profile.duration * 1000, 2),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with open(os.path.join(self.folder, name + '.json'), 'w') as f:
+            json.dump(metadata, f)
+        self.prune()
+        return name
+
+    def _profile_files(self):
+        """Return (mtime, name, size) for stored profiles, newest first."""
+        if not os.path.isdir(self.folder):
+            return []
+        entries = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(tuple(PROFILE_EXTENSIONS.values())):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        entries.sort(reverse=True)
+        return entries
+
+    def prune(self):
+        total = 0
+        for index, (_, name, size) in enumerate(self._profile_files()):
+            total += size
+            if index >= self.max_files or total > self.max_bytes:
+                for filename in (name, name + '.json'):
+                    try:
+                        os.remove(os.path.join(self.folder, filename))
+                    except OSError:
+                        pass
+
+    def list(self):
+        """Return metadata for stored profiles, newest first."""
+        profiles = []
+        for _, name, size in self._profile_files():
+            metadata = {'name': name}
+            try:
+                with open(os.path.join(self.folder, name + '.json')) as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                pass
+            metadata['size_bytes'] = size
+            profiles.append(metadata)
+        return profiles
+
+    def path_for(self, name):
+        """Resolve a stored profile name to a path, rejecting anything else."""
+        if os.path.basename(name) != name:
+            return None
+        if not name.endswith(tuple(PROFILE_EXTENSIONS.values())):
+            return None
+        path = os.path.join(self.folder, name)
+        return path if os.path.isfile(path) else None
+
+
+def current_thread_id():
+    """Real OS thread id of the caller (eventlet patches threading.get_ident)."""
+    return _real_threading.get_ident()
+
+
+def try_acquire():
+    return _profile_lock.acquire(blocking=False)
+
+
+def release():
+    _profile_lock.release()
@@ -0,0 +1,314 @@
+"""
+Materialised per-site, per-period aggregates of analysis results.
+
+Every completed analysis is folded into running accumulators for its site,
+both for its calendar month and for the site's whole history ('all'). Each
+accumulator keeps:
+
+- count, sum, min and max of every metric, for the mean and range;
+- a fixed-width histogram, so percentiles are read from a bounded number of
+  bins instead of the raw values;
+- least-squares sums over (day, value), so the trend (slope per 30 days) is
+  available without revisiting earlier sessions.
+
+Summaries are recomputed only for the two accumulators an analysis touches,
+so dashboard reads are dictionary lookups. The aggregates are snapshotted
+atomically to disk together with the ids of the sessions they include, in
+batches rather than per analysis: a background flusher writes the snapshot
+every `flush_interval` seconds, or sooner once `max_pending` analyses are
+waiting, and once more at exit. Sessions stored while the snapshot was
+stale (including any added after the last flush before a crash) are folded
+in on load.
+"""
+
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+ALL_PERIODS = 'all'
+TREND_DAYS = 30
+PERCENTILES = (10, 50, 90)
+# Days are counted from here so the least-squares sums stay small and precise
+DAY_ZERO = date(2024, 1, 1).toordinal()
+
+# metric -> (histogram lower bound, upper bound, bin width); values outside are clamped to the edge bins
+METRICS = {
+    'fish_health_index': (0.0, 1.2, 0.01),
+    'fish_density': (0, 500, 5),
+    'invertebrate_cover': (0, 100, 1),
+    'coral_bleaching': (0, 100, 1),
+}
+
+
+def period_of(date_text):
+    """Return the monthly period ('YYYY-MM') of an ISO date string."""
+    return date_text[:7]
+
+
+class MetricAccumulator:
+    """Running count/sum/min/max, histogram and trend sums for one metric."""
+
+    __slots__ = ('low', 'width', 'count', 'total', 'minimum', 'maximum', 'bins',
+                 'sum_x', 'sum_xx', 'sum_xy')
+
+    def __init__(self, low, high, width):
+        self.low = low
+        self.width = width
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.bins = [0] * int(round((high - low) / width))
+        self.sum_x = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+
+    def add(self, value, day):
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        index = int((value - self.low) / self.width)
+        self.bins[max(0, min(index, len(self.bins) - 1))] += 1
+        self.sum_x += day
+        self.sum_xx += day * day
+        self.sum_xy += day * value
+
+    def percentile(self, pct):
+        """Approximate percentile: midpoint of the bin holding the pct-th value, within [min, max]."""
+        rank = max(1, round(pct / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.bins):
+            seen += count
+            if seen >= rank:
+                midpoint = self.low + (index + 0.5) * self.width
+                return min(max(midpoint, self.minimum), self.maximum)
+        return self.maximum
+
+    def trend(self):
+        """Least-squares slope of the metric per TREND_DAYS days, or None without a time spread."""
+        denominator = self.count * self.sum_xx - self.sum_x ** 2
+        if self.count < 2 or abs(denominator) < 1e-9:
+            return None
+        slope = (self.count * self.sum_xy - self.sum_x * self.total) / denominator
+        return slope * TREND_DAYS
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        trend = self.trend()
+        summary = {
+            'count': self.count,
+            'mean': round(self.total / self.count, 4),
+            'min': self.minimum,
+            'max': self.maximum,
+            'trend_per_30_days': round(trend, 4) if trend is not None else None,
+        }
+        for pct in PERCENTILES:
+            summary[f'p{pct}'] = round(self.percentile(pct), 4)
+        return summary
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        accumulator = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(accumulator, name, data[name])
+        return accumulator
+
+
+class SiteRollups:
+    """
+    Incrementally maintained per-site and per-period summaries.
+
+    Args:
+        path (str): Snapshot file; None keeps the rollups in memory only
+        flush_interval (float): Seconds between background snapshot writes
+        max_pending (int): Write early once this many analyses are unsaved
+    """
+
+    def __init__(self, path=None, flush_interval=60.0, max_pending=50):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._accumulators = {}  # (site, period) -> {metric: MetricAccumulator}
+        self._summaries = {}     # (site, period) -> materialised summary dict
+        self._periods = {}       # site -> sorted list of monthly periods
+        self._session_ids = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._session_ids)
+
+    @classmethod
+    def load(cls, path, session_store=None, **kwargs):
+        """Load the snapshot at `path`, then fold in stored sessions it does not include yet."""
+        rollups = cls(path, **kwargs)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            rollups._session_ids = set(data['session_ids'])
+            for entry in data['accumulators']:
+                key = (entry['site'], entry['period'])
+                rollups._accumulators[key] = {
+                    metric: MetricAccumulator.from_dict(values) for metric, values in entry['metrics'].items()
+                }
+                rollups._refresh(key)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable rollup snapshot {path}: {e}")
+            rollups = cls(path, **kwargs)
+        if session_store is not None:
+            added = 0
+            for session_id in session_store.session_ids():
+                if session_id not in rollups._session_ids:
+                    results = session_store.load(session_id)
+                    if results is not None and rollups.add_results(results):
+                        added += 1
+            if added:
+                logger.info(f"Folded {added} stored sessions into the site rollups")
+                rollups.flush()
+        return rollups
+
+    def _refresh(self, key):
+        site, period = key
+        self._summaries[key] = {
+            'site': site,
+            'period': period,
+            'sessions': max(acc.count for acc in self._accumulators[key].values()),
+            'metrics': {metric: acc.summary() for metric, acc in self._accumulators[key].items()},
+        }
+        if period != ALL_PERIODS:
+            periods = self._periods.setdefault(site, [])
+            if period not in periods:
+                periods.append(period)
+                periods.sort()
+
+    def add_results(self, results):
+        """
+        Fold one session's results into its site's rollups.
+
+        The snapshot is written later by flush(); returns False if the
+        session was already included or has no site or date.
+        """
+        session_id = results.get('session_id')
+        site = results.get('location')
+        date_text = results.get('date')
+        if not site or not date_text or session_id in self._session_ids:
+            return False
+        try:
+            day = date.fromisoformat(date_text).toordinal() - DAY_ZERO
+        except ValueError:
+            return False
+        with self._lock:
+            if session_id in self._session_ids:
+                return False
+            for key in ((site, ALL_PERIODS), (site, period_of(date_text))):
+                accumulators = self._accumulators.get(key)
+                if accumulators is None:
+                    accumulators = self._accumulators[key] = {
+                        metric: MetricAccumulator(*bounds) for metric, bounds in METRICS.items()
+                    }
+                for metric, accumulator in accumulators.items():
+                    value = results.get(metric)
+                    if isinstance(value, (int, float)):
+                        accumulator.add(value, day)
+                self._refresh(key)
+            if session_id is not None:
+                self._session_ids.add(session_id)
+            self._pending += 1
+            if self._pending >= self.max_pending:
+                self._wake.set()
+        return True
+
+    def flush(self):
+        """Atomically write the snapshot if anything changed since the last write."""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._pending:
+                return False
+            pending = self._pending
+            self._pending = 0
+            snapshot = {
+                'session_ids': list(self._session_ids),
+                'accumulators': [
+                    {
+                        'site': site,
+                        'period': period,
+                        'metrics': {metric: acc.to_dict() for metric, acc in accumulators.items()},
+                    }
+                    for (site, period), accumulators in self._accumulators.items()
+                ],
+            }
+        folder = os.path.dirname(self.path) or '.'
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not write rollup snapshot: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            with self._lock:
+                self._pending += pending
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        """Start the background flusher (idempotent); a final flush also runs at exit."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def summary(self, site, period=ALL_PERIODS):
+        """Return the materialised summary for a site and period, or None if there is no data."""
+        return self._summaries.get((site, period))
+
+    def periods(self, site):
+        """Monthly periods with data for a site, oldest first."""
+        return list(self._periods.get(site, ()))
+
+    def compare(self, site, baseline, period=ALL_PERIODS):
+        """
+        Compare a site's mean metrics with a baseline.
+
+        Returns None if there is no data; otherwise per metric the mean, the
+        baseline value, the difference and the mean as a percentage of the baseline.
+        """
+        summary = self._summaries.get((site, period))
+        if summary is None:
+            return None
+        comparison = {}
+        for metric, stats in summary['metrics'].items():
+            if metric not in baseline or not stats['count']:
+                continue
+            reference = baseline[metric]
+            comparison[metric] = {
+                'mean': stats['mean'],
+                'baseline': reference,
+                'difference': round(stats['mean'] - reference, 4),
+                'percent_of_baseline': round(stats['mean'] / reference * 100, 1) if reference else None,
+            }
+        return {'site': site, 'period': period, 'sessions': summary['sessions'], 'metrics': comparison}
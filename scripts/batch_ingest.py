@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Analyse a whole survey campaign from the command line.
+
+Takes a ZIP archive or a directory of dive videos and runs the same
+pipeline as the /batch endpoint in this process: archive entries are
+streamed into the upload folder one at a time, analysed by --workers
+concurrent workers, and the results are persisted to DATA_FOLDER where the
+web application picks them up. Progress is printed as videos finish and a
+campaign summary is printed at the end (or written as JSON with --json).
+
+Usage:
+    python scripts/batch_ingest.py campaign_2025-07-14.zip
+    python scripts/batch_ingest.py /data/dives/2025-07-14 --workers 4 --json summary.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import zipfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import app as reef_app  # noqa: E402
+from campaigns import Campaign, zip_items, directory_items  # noqa: E402
+
+
+def print_event(event, data):
+    if event == 'campaign_progress':
+        eta = f"{data['eta_seconds']:.0f}s" if data['eta_seconds'] is not None else '-'
+        print(
+            f"[{data['elapsed_seconds']:>7.1f}s] {data['completed']}/{data['total']} analysed, "
+            f"{data['failed']} failed, {data['in_progress']} running, "
+            f"{data['videos_per_minute']:.2f} videos/min, ETA {eta}",
+            flush=True
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='ZIP archive or directory of videos')
+    parser.add_argument('--workers', type=int, default=reef_app.app.config['BATCH_WORKERS'],
+                        help='videos analysed concurrently')
+    parser.add_argument('--json', metavar='PATH', help='write the campaign summary as JSON')
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        items, archive_path = directory_items(args.source), None
+    else:
+        try:
+            items, archive_path = zip_items(args.source), args.source
+        except (OSError, zipfile.BadZipFile) as e:
+            parser.error(f"{args.source} is neither a directory nor a readable ZIP archive: {e}")
+    if not items:
+        parser.error(f"No videos found in {args.source}")
+
+    campaign = Campaign(
+        reef_app.generate_analysis_id(), items, reef_app._analyze_campaign_item,
+        workers=args.workers, emit=print_event, archive_path=archive_path
+    )
+    print(f"Campaign {campaign.campaign_id}: {len(items)} videos, {campaign.workers} workers")
+    summary = campaign.run()
+
+    print(f"\nAnalysed {summary['completed']} of {summary['total']} videos in {summary['elapsed_seconds']:.1f}s "
+          f"({summary['videos_per_minute']:.2f} videos/min)")
+    for site, stats in sorted(summary['sites'].items()):
+        print(f"  {site:<28}{stats['videos']:>4} videos   mean FHI {stats['mean_fhi']:.2f}")
+    for failure in summary['failures']:
+        print(f"  FAILED {failure['filename']}: {failure['error']}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark how much time logging adds to each request.
+
+Drives a mix of requests (/about, /results/<id>, /chatbot with a predefined
+question) through the Flask test client under several logging setups and
+reports the mean and p95 time per request, and the overhead compared with
+logging disabled:
+
+- none: records are discarded
+- sync: the previous setup, FileHandler + StreamHandler on the request thread
+- queued: logging_setup.configure_logging without sampling
+- queued+sampled: logging_setup.configure_logging with 1-in-10 sampling
+
+--disk-latency-ms adds an artificial delay to every file write to show what a
+slow or contended disk does to request latency.
+
+Usage:
+    python scripts/bench_logging.py --requests 2000
+    python scripts/bench_logging.py --requests 500 --disk-latency-ms 2
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.gettempdir(), 'bench_logging_app.log'))
+
+import app as reef_app  # noqa: E402  (configures logging on import)
+import logging_setup  # noqa: E402
+from eventlet import patcher  # noqa: E402
+
+_real_time = patcher.original('time')
+
+
+class SlowStream:
+    """File stream wrapper that blocks for a fixed time on every write."""
+
+    def __init__(self, stream, delay):
+        self._stream = stream
+        self._delay = delay
+
+    def write(self, data):
+        _real_time.sleep(self._delay)
+        return self._stream.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    return root
+
+
+def setup_none(log_path, delay):
+    root = _reset_root()
+    root.addHandler(logging.NullHandler())
+    return None
+
+
+def setup_sync(log_path, delay):
+    root = _reset_root()
+    file_handler = logging.FileHandler(log_path)
+    if delay:
+        file_handler.stream = SlowStream(file_handler.stream, delay)
+    stream_handler = logging.StreamHandler(open(os.devnull, 'w'))
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(logging.Formatter(logging_setup.DEFAULT_FORMAT))
+        root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    return None
+
+
+def _setup_queued(log_path, delay, sample_rate):
+    _reset_root()
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, 'w')
+    try:
+        listener = logging_setup.configure_logging(log_file=log_path, default_sample_rate=sample_rate)
+    finally:
+        sys.stderr = stderr
+    if delay:
+        for handler in listener.handlers:
+            if isinstance(handler, logging.FileHandler):
+                handler.stream = SlowStream(handler.stream, delay)
+    return listener
+
+
+def setup_queued(log_path, delay):
+    return _setup_queued(log_path, delay, sample_rate=1)
+
+
+def setup_queued_sampled(log_path, delay):
+    return _setup_queued(log_path, delay, sample_rate=10)
+
+
+SETUPS = [
+    ('none', setup_none),
+    ('sync', setup_sync),
+    ('queued', setup_queued),
+    ('queued+sampled', setup_queued_sampled),
+]
+
+
+def run_requests(client, session_id, count):
+    """Return per-request durations in milliseconds."""
+    calls = [
+        lambda: client.get('/about'),
+        lambda: client.get(f'/results/{session_id}'),
+        lambda: client.post('/chatbot', json={'session_id': session_id, 'query': 'What is the fish trend?'}),
+    ]
+    durations = []
+    for index in range(count):
+        started = time.perf_counter()
+        response = calls[index % len(calls)]()
+        durations.append((time.perf_counter() - started) * 1000)
+        response.close()
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1500, help='requests per logging setup')
+    parser.add_argument('--disk-latency-ms', type=float, default=0.0, help='artificial delay per file write')
+    args = parser.parse_args()
+
+    session_id = 'bench001'
+    reef_app.analysis_sessions[session_id] = {
+        'session_id': session_id, 'location': 'La Paz', 'fish_density': 120,
+        'invertebrate_cover': 30, 'coral_bleaching': 20, 'fish_health_index': 0.36,
+    }
+    client = reef_app.app.test_client()
+    delay = args.disk_latency_ms / 1000.0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, setup in SETUPS:
+            listener = setup(os.path.join(tmp, f"{name}.log"), delay)
+            run_requests(client, session_id, min(100, args.requests))  # warm-up
+            durations = run_requests(client, session_id, args.requests)
+            if listener is not None:
+                listener.stop()
+            durations.sort()
+            results[name] = {
+                'mean_ms': statistics.fmean(durations),
+                'p95_ms': durations[int(len(durations) * 0.95) - 1],
+            }
+        _reset_root()
+
+    baseline = results['none']['mean_ms']
+    print(f"{args.requests} requests per setup, disk latency {args.disk_latency_ms} ms per write")
+    print(f"{'setup':<16}{'mean ms':>10}{'p95 ms':>10}{'overhead ms':>14}")
+    for name, stats in results.items():
+        overhead = stats['mean_ms'] - baseline
+        print(f"{name:<16}{stats['mean_ms']:>10.3f}{stats['p95_ms']:>10.3f}{overhead:>14.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
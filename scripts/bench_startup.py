@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Flask application.
+
+Measures, over several fresh interpreter runs:
+- the time to `import app` (and the slowest modules, via -X importtime)
+- the time from launching `python app.py` to the first successful /healthz
+
+This is a manual tool, not a CI check: timings depend on the machine, so no
+baseline is committed. Save one on your own machine before a change and
+compare after it to catch import regressions (e.g. a heavy module imported
+at top level again); the comparison exits non-zero on a regression.
+
+Usage:
+    python scripts/bench_startup.py --runs 5
+    python scripts/bench_startup.py --save-baseline /tmp/startup_baseline.json
+    python scripts/bench_startup.py --baseline /tmp/startup_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _env(port=None):
+    env = dict(os.environ)
+    env.setdefault('LOOP_MONITOR_ENABLED', '0')
+    env['WARMUP_ON_START'] = '0'
+    if port is not None:
+        env['PORT'] = str(port)
+    return env
+
+
+def measure_import():
+    """Return seconds spent importing the app module in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_SNIPPET],
+        cwd=REPO_ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit=10):
+    """Return the modules with the largest cumulative import time (in ms)."""
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=REPO_ROOT, env=_env(), capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((int(cumulative_us), name.strip()))
+    modules.sort(reverse=True)
+    return [{'module': name, 'cumulative_ms': round(us / 1000, 1)} for us, name in modules[:limit]]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_healthz(timeout=60.0):
+    """Return seconds from process launch until /healthz first answers 200."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/healthz"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'app.py'],
+        cwd=REPO_ROOT, env=_env(port), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"app.py exited early with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"/healthz did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def summarize(values):
+    return {
+        'runs': len(values),
+        'min_s': round(min(values), 4),
+        'median_s': round(statistics.median(values), 4),
+        'max_s': round(max(values), 4),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages (empty when within tolerance)."""
+    regressions = []
+    for key in ('import', 'first_healthz'):
+        if key not in baseline or key not in results:
+            continue
+        current = results[key]['median_s']
+        reference = baseline[key]['median_s']
+        limit = reference * (1 + tolerance)
+        status = 'REGRESSION' if current > limit else 'ok'
+        print(f"{key:>14}: median {current:.3f}s vs baseline {reference:.3f}s (limit {limit:.3f}s) {status}")
+        if current > limit:
+            regressions.append(f"{key} median {current:.3f}s exceeds {limit:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreter runs per measurement')
+    parser.add_argument('--skip-server', action='store_true', help='only measure import time')
+    parser.add_argument('--baseline', help='compare against a saved baseline JSON file')
+    parser.add_argument('--save-baseline', help='write the results to this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs baseline (0.25 = 25%%)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = {
+        'python': sys.version.split()[0],
+        'import': summarize([measure_import() for _ in range(args.runs)]),
+        'slowest_imports': slowest_imports(),
+    }
+    if not args.skip_server:
+        results['first_healthz'] = summarize([measure_first_healthz() for _ in range(args.runs)])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"import app     : {results['import']}")
+        if 'first_healthz' in results:
+            print(f"first /healthz : {results['first_healthz']}")
+        print("slowest imports (cumulative):")
+        for entry in results['slowest_imports']:
+            print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('Startup regression detected: ' + '; '.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
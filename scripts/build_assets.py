@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Build the bundled, fingerprinted and pre-compressed static assets.
+
+Run at deploy time (the Dockerfile and render.yaml do); the app picks up
+the new manifest when it starts. See assets.py for what is built.
+
+Usage:
+    python scripts/build_assets.py
+    python scripts/build_assets.py --output static/dist
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from assets import build_assets  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle, minify, fingerprint and pre-compress static assets.")
+    parser.add_argument('--static', default=os.path.join(REPO_ROOT, 'static'), help="Static folder holding the sources")
+    parser.add_argument('--output', default=os.getenv('ASSET_FOLDER', os.path.join(REPO_ROOT, 'static', 'dist')),
+                        help="Folder the built files and manifest.json are written to")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    manifest = build_assets(args.static, args.output)
+    for name, entry in manifest.items():
+        sizes = ', '.join(f"{key.replace('_bytes', '')} {value:,} B" for key, value in entry.items() if key.endswith('_bytes'))
+        print(f"{name:8} -> {entry['file']}  ({entry['bytes']:,} B; {sizes})")
+
+
+if __name__ == '__main__':
+    main()
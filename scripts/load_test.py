@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Load test of the full user flow over HTTP and Socket.IO.
+
+Each simulated client connects a Socket.IO client and repeatedly runs the
+flow a user goes through in the browser:
+
+    upload -> analysis progress events -> results -> PDF report -> chatbot
+
+By default a fresh server is started with the 'realistic' stage profile on
+a virtual clock (SIM_TIME_SCALE=0) and a temporary data folder, so a run
+measures the server rather than the simulated analysis time; --time-scale
+and --profile change that, and --url targets an already running server.
+Upload filenames are chosen from a seeded generator, so a run with the same
+options exercises the same sites and analysis results.
+
+Reports requests/s, completed flows/s and per-endpoint latency percentiles
+(p50/p95/p99). Results can be saved as a baseline and later runs compared
+against it, failing when an endpoint's p95 regresses.
+
+Requires the Socket.IO client extras: pip install "python-socketio[client]"
+
+Usage:
+    python scripts/load_test.py --clients 20 --iterations 3
+    python scripts/load_test.py --clients 10 --save-baseline bench/load_baseline.json
+    python scripts/load_test.py --clients 10 --baseline bench/load_baseline.json --tolerance 0.5
+    python scripts/load_test.py --url http://localhost:8080 --clients 5
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from loop_monitor import percentile  # noqa: E402
+
+try:
+    import requests
+    import socketio
+except ImportError:
+    sys.exit('The load test needs the Socket.IO client extras: pip install "python-socketio[client]"')
+
+# The chatbot quick prompts offered in the UI (templates/index.html)
+CHAT_PROMPTS = [
+    "What are the latest fish trends here?",
+    "How does temperature correlate with fish biomass in this area?",
+    "Compare this site to the Cabo Pulmo baseline",
+]
+UPLOAD_NAMES = ['la_paz', 'cabo_pulmo', 'loreto', 'corredor', 'bahia_de_los_angeles', 'algal_bloom', 'unknown_site']
+FAKE_VIDEO = b'\x00\x00\x00\x18ftypmp42' + b'\x00' * 4096
+ENDPOINTS = ('socketio_connect', 'upload', 'analysis', 'results', 'generate_pdf', 'chatbot')
+
+
+class Recorder:
+    """Thread-safe collection of per-endpoint latencies and errors."""
+
+    def __init__(self):
+        self.latencies = {name: [] for name in ENDPOINTS}
+        self.errors = {name: 0 for name in ENDPOINTS}
+        self.flows = 0
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.latencies[name].append(seconds * 1000)
+
+    def error(self, name):
+        with self._lock:
+            self.errors[name] += 1
+
+    def flow_done(self):
+        with self._lock:
+            self.flows += 1
+
+
+class SimulatedClient:
+    """One browser session: a Socket.IO connection plus HTTP calls."""
+
+    def __init__(self, base_url, recorder, rng, timeout):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.rng = rng
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.sio = socketio.Client(reconnection=False)
+        self._completed = set()
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self.sio.on('analysis_complete', self._on_complete)
+
+    def _on_complete(self, data):
+        # Events are broadcast to every client; only wake the flow waiting on this session
+        with self._lock:
+            self._completed.add(data.get('session_id'))
+            waiter = self._waiters.get(data.get('session_id'))
+        if waiter is not None:
+            waiter.set()
+
+    def _timed(self, name, call):
+        started = time.perf_counter()
+        try:
+            response = call()
+            response.raise_for_status()
+        except requests.RequestException:
+            self.recorder.error(name)
+            return None
+        self.recorder.record(name, time.perf_counter() - started)
+        return response
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            self.sio.connect(self.base_url, transports=['websocket'], wait_timeout=self.timeout)
+        except socketio.exceptions.ConnectionError:
+            self.recorder.error('socketio_connect')
+            return False
+        self.recorder.record('socketio_connect', time.perf_counter() - started)
+        return True
+
+    def run_flow(self):
+        filename = f"{self.rng.choice(UPLOAD_NAMES)}_{self.rng.randint(1, 9999):04d}.mp4"
+        started = time.perf_counter()
+        response = self._timed('upload', lambda: self.http.post(
+            f"{self.base_url}/upload", files={'video': (filename, FAKE_VIDEO, 'video/mp4')}, timeout=self.timeout
+        ))
+        if response is None:
+            return
+        session_id = response.json()['session_id']
+
+        # On a virtual clock the analysis can complete before the upload response arrives
+        waiter = threading.Event()
+        with self._lock:
+            if session_id in self._completed:
+                waiter.set()
+            self._waiters[session_id] = waiter
+        completed = waiter.wait(self.timeout)
+        with self._lock:
+            self._waiters.pop(session_id)
+        if not completed:
+            self.recorder.error('analysis')
+            return
+        self.recorder.record('analysis', time.perf_counter() - started)
+
+        response = self._timed('results', lambda: self.http.get(f"{self.base_url}/results/{session_id}", timeout=self.timeout))
+        if response is None:
+            return
+        results = response.json()
+        if self._timed('generate_pdf', lambda: self.http.post(
+            f"{self.base_url}/generate-pdf", json={'session_id': session_id, 'results': results}, timeout=self.timeout
+        )) is None:
+            return
+        for prompt in CHAT_PROMPTS:
+            self._timed('chatbot', lambda: self.http.post(
+                f"{self.base_url}/chatbot", json={'session_id': session_id, 'query': prompt}, timeout=self.timeout
+            ))
+        self.recorder.flow_done()
+
+    def close(self):
+        if self.sio.connected:
+            self.sio.disconnect()
+        self.http.close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(profile, time_scale, workdir, timeout=60.0):
+    """Launch app.py in `workdir` with a simulated pipeline and wait for /healthz."""
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        'PORT': str(port),
+        'SIM_STAGE_PROFILE': profile,
+        'SIM_TIME_SCALE': str(time_scale),
+        'DATA_FOLDER': os.path.join(workdir, 'data'),
+        'LOG_FILE': os.path.join(workdir, 'app.log'),
+        'WARMUP_ON_START': '1',
+        'WARMUP_DELAY': '0',
+        'OPENAI_API_KEY': '',
+    })
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'app.py')],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"app.py exited early with code {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/healthz", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"/healthz did not answer within {timeout}s")
+
+
+def run_load(base_url, clients, iterations, seed, timeout):
+    """Run `clients` concurrent clients for `iterations` flows each and return the results."""
+    recorder = Recorder()
+    simulated = [SimulatedClient(base_url, recorder, random.Random(seed + index), timeout) for index in range(clients)]
+
+    def drive(client):
+        if client.connect():
+            for _ in range(iterations):
+                client.run_flow()
+        client.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=drive, args=(client,)) for client in simulated]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name in ENDPOINTS:
+        values = sorted(recorder.latencies[name])
+        endpoints[name] = {'count': len(values), 'errors': recorder.errors[name]}
+        if values:
+            endpoints[name].update({
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+                'max_ms': round(values[-1], 2),
+            })
+    requests_made = sum(entry['count'] + entry['errors'] for name, entry in endpoints.items()
+                        if name not in ('socketio_connect', 'analysis'))
+    return {
+        'clients': clients,
+        'iterations': iterations,
+        'seed': seed,
+        'elapsed_s': round(elapsed, 3),
+        'flows_completed': recorder.flows,
+        'flows_per_s': round(recorder.flows / elapsed, 3),
+        'requests_per_s': round(requests_made / elapsed, 2),
+        'endpoints': endpoints,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages (empty when within tolerance)."""
+    regressions = []
+    for name, entry in results['endpoints'].items():
+        reference = baseline.get('endpoints', {}).get(name, {}).get('p95_ms')
+        if reference is None or 'p95_ms' not in entry:
+            continue
+        limit = reference * (1 + tolerance)
+        status = 'REGRESSION' if entry['p95_ms'] > limit else 'ok'
+        print(f"{name:>17}: p95 {entry['p95_ms']:.1f} ms vs baseline {reference:.1f} ms (limit {limit:.1f} ms) {status}")
+        if entry['p95_ms'] > limit:
+            regressions.append(f"{name} p95 {entry['p95_ms']:.1f} ms exceeds {limit:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=10, help='concurrent simulated clients')
+    parser.add_argument('--iterations', type=int, default=2, help='flows per client')
+    parser.add_argument('--url', help='test a running server instead of starting one')
+    parser.add_argument('--profile', default='realistic', help='stage profile for the started server')
+    parser.add_argument('--time-scale', type=float, default=0.0,
+                        help='wall-clock seconds per simulated second for the started server (0 = virtual clock)')
+    parser.add_argument('--seed', type=int, default=1, help='seed for upload filenames')
+    parser.add_argument('--timeout', type=float, default=120.0, help='seconds to wait for any single step')
+    parser.add_argument('--baseline', help='compare against a saved baseline JSON file')
+    parser.add_argument('--save-baseline', help='write the results to this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed p95 slowdown vs baseline (0.5 = 50%%)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    process, workdir = None, None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        workdir = tempfile.mkdtemp(prefix='reef_load_')
+        process, base_url = start_server(args.profile, args.time_scale, workdir)
+    try:
+        results = run_load(base_url, args.clients, args.iterations, args.seed, args.timeout)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['clients']} clients x {results['iterations']} flows in {results['elapsed_s']:.2f}s: "
+              f"{results['flows_completed']} flows completed, {results['flows_per_s']:.2f} flows/s, "
+              f"{results['requests_per_s']:.1f} requests/s")
+        print(f"{'endpoint':<18}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, entry in results['endpoints'].items():
+            if entry['count']:
+                print(f"{name:<18}{entry['count']:>7}{entry['errors']:>8}{entry['p50_ms']:>10.1f}"
+                      f"{entry['p95_ms']:>10.1f}{entry['p99_ms']:>10.1f}{entry['max_ms']:>10.1f}")
+            else:
+                print(f"{name:<18}{0:>7}{entry['errors']:>8}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('Load test regression detected: ' + '; '.join(regressions))
+            return 1
+    failed = sum(entry['errors'] for entry in results['endpoints'].values())
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
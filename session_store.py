@@ -0,0 +1,73 @@
+"""
+Durable storage for completed analysis results.
+
+Each session is written as one JSON file, atomically (temporary file +
+rename), so a crash never leaves a half-written result behind. Results can
+be iterated one file at a time, which keeps memory flat for large histories.
+"""
+
+import json
+import os
+import tempfile
+
+
+class SessionStore:
+    """
+    One-JSON-file-per-session result store.
+
+    Args:
+        folder (str): Directory holding `<session_id>.json` files
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, session_id):
+        # Session ids are generated server-side, but never trust them as paths
+        safe_id = os.path.basename(str(session_id))
+        return os.path.join(self.folder, f"{safe_id}.json")
+
+    def save(self, session_id, results):
+        """Atomically write the results for a session."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(results, f)
+            os.replace(tmp_path, self._path(session_id))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def load(self, session_id):
+        """Return the stored results for a session, or None."""
+        try:
+            with open(self._path(session_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, session_id):
+        """Remove a session's file if present."""
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, session_id):
+        return os.path.isfile(self._path(session_id))
+
+    def session_ids(self):
+        """Yield stored session ids without loading their results."""
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.json'):
+                    yield entry.name[:-len('.json')]
+
+    def iter_results(self):
+        """Yield stored results one session at a time."""
+        for session_id in self.session_ids():
+            results = self.load(session_id)
+            if results is not None:
+                yield results
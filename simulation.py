@@ -0,0 +1,86 @@
+"""
+Timing model of the simulated analysis pipeline.
+
+How long an analysis takes is controlled by two independent settings, so
+load tests and demos do not have to wait ~29 s per upload:
+
+- a stage profile gives the simulated seconds of work for each pipeline
+  stage: 'realistic' (the default, ~29 s), 'quick' (~3 s), 'instant' (no
+  work), or a JSON file mapping stage names to seconds (stages it leaves
+  out keep their realistic duration);
+- the clock's time scale converts simulated seconds to wall-clock seconds:
+  1 runs in real time, 0.01 runs 100x faster, and 0 is a virtual clock that
+  only yields to other green threads while simulated time advances.
+
+Stage outputs do not depend on either setting: metrics come from a
+per-session random generator and frame offsets from simulated durations,
+so a session id produces the same results under every profile and scale.
+"""
+
+import json
+import threading
+import time
+
+# Pipeline stages: (name, progress message, realistic seconds of work)
+ANALYSIS_STAGES = [
+    ('initialize', "Initializing video processing pipeline...", 2),
+    ('extract_frames', "Extracting frames for analysis...", 3),
+    ('fish_density', "Analyzing fish density using computer vision...", 5),
+    ('species', "Identifying fish species and counting individuals...", 4),
+    ('invertebrate_cover', "Estimating invertebrate cover using segmentation...", 4),
+    ('coral_bleaching', "Detecting coral bleaching patterns...", 3),
+    ('invasive_species', "Screening for invasive species...", 3),
+    ('algal_bloom', "Performing algal bloom detection...", 2),
+    ('indices', "Computing ecological indices...", 2),
+    ('report', "Generating assessment report...", 1)
+]
+
+STAGE_PROFILES = {
+    'realistic': {name: seconds for name, _, seconds in ANALYSIS_STAGES},
+    'quick': {name: seconds / 10 for name, _, seconds in ANALYSIS_STAGES},
+    'instant': {name: 0 for name, _, _ in ANALYSIS_STAGES},
+}
+
+
+def load_stage_profile(name_or_path):
+    """
+    Return {stage name: simulated seconds} for a built-in profile name or a JSON file.
+
+    Raises:
+        ValueError: If the file names unknown stages or negative durations
+    """
+    if name_or_path in STAGE_PROFILES:
+        return dict(STAGE_PROFILES[name_or_path])
+    with open(name_or_path) as f:
+        overrides = json.load(f)
+    unknown = set(overrides) - set(STAGE_PROFILES['realistic'])
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages in {name_or_path}: {', '.join(sorted(unknown))}")
+    if any(float(seconds) < 0 for seconds in overrides.values()):
+        raise ValueError(f"Stage durations in {name_or_path} must not be negative")
+    profile = dict(STAGE_PROFILES['realistic'])
+    profile.update({stage: float(seconds) for stage, seconds in overrides.items()})
+    return profile
+
+
+class SimulationClock:
+    """
+    Clock that waits a scaled fraction of each simulated interval.
+
+    Args:
+        scale (float): Wall-clock seconds per simulated second (0 = virtual clock)
+    """
+
+    def __init__(self, scale=1.0):
+        if scale < 0:
+            raise ValueError("Time scale must not be negative")
+        self.scale = scale
+        self.simulated_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds):
+        """Advance simulated time by `seconds`, waiting seconds * scale of real time."""
+        with self._lock:
+            self.simulated_seconds += seconds
+        # time.sleep(0) still yields, so a virtual clock does not starve the hub
+        time.sleep(seconds * self.scale)
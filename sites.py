@@ -0,0 +1,231 @@
+"""
+Monitored site registry.
+
+Sites are loaded from a JSON data file (data/sites.json) instead of being
+hard-coded, and resolved two ways:
+
+- by filename: every alias of every site is compiled into a single
+  trie-shaped regular expression, so one pass over the normalised filename
+  finds every alias in it (as whole `_`-separated tokens) however many
+  sites are registered; when several sites match, the one with the lowest
+  match_priority (then the earliest in the registry) wins;
+- by position: a uniform lat/lng grid index returns the nearest site to GPS
+  coordinates (from the client or the video's metadata) by searching rings
+  of cells outward, so lookups stay cheap with thousands of survey sites.
+"""
+
+import json
+import math
+import re
+import shutil
+import subprocess
+import unicodedata
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+# ISO 6709 position as written by phones and action cameras, e.g. "+24.1426-110.3128/"
+_ISO6709 = re.compile(r'([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)')
+
+
+def normalize_name(text):
+    """Lowercase, strip accents and collapse separators to underscores."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[\s\-.]+', '_', text.lower())
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _trie_regex(words):
+    """Build a regex matching any of `words`, sharing common prefixes (longest match wins)."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # An alias ending here: the longer continuation is tried first (greedy)
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+def read_video_gps(video_path, timeout=10):
+    """
+    Return (lat, lng) from a video's container metadata, or None.
+
+    Uses ffprobe when it is installed; most phones and action cameras write
+    an ISO 6709 'location' tag.
+    """
+    if not video_path or shutil.which('ffprobe') is None:
+        return None
+    command = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', video_path]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=timeout, check=True)
+        tags = json.loads(output.stdout).get('format', {}).get('tags', {})
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    for key, value in tags.items():
+        if 'location' in key.lower():
+            match = _ISO6709.search(value)
+            if match:
+                return float(match.group(1)), float(match.group(2))
+    return None
+
+
+class Site:
+    """A monitored site with its position, filename aliases and simulation profile."""
+
+    __slots__ = ('name', 'lat', 'lng', 'description', 'aliases', 'profile', 'match_priority')
+
+    def __init__(self, name, lat, lng, description='', aliases=(), profile=None, match_priority=0):
+        self.name = name
+        self.lat = lat
+        self.lng = lng
+        self.description = description
+        self.aliases = tuple(aliases)
+        self.profile = profile
+        self.match_priority = match_priority
+
+    def to_dict(self):
+        return {'name': self.name, 'lat': self.lat, 'lng': self.lng, 'description': self.description}
+
+
+class SiteRegistry:
+    """
+    Registry of monitored sites with alias and nearest-site lookups.
+
+    Args:
+        sites (list): Site objects
+        default_profile (dict): Metric ranges for sites without their own profile
+        algal_bloom_profile (dict): Overrides applied when a filename flags an algal bloom
+        cell_degrees (float): Size of the spatial grid cells in degrees
+    """
+
+    def __init__(self, sites, default_profile=None, algal_bloom_profile=None, cell_degrees=0.5):
+        self.sites = list(sites)
+        self.default_profile = default_profile or {}
+        self.algal_bloom_profile = algal_bloom_profile or {}
+        self.cell_degrees = cell_degrees
+        self._by_name = {site.name: site for site in self.sites}
+        self._by_normalized_name = {normalize_name(site.name): site for site in self.sites}
+
+        # Alias matcher: one compiled pattern over every alias of every site,
+        # matched on whole `_`-separated tokens. At each token the longest alias
+        # wins; across the filename the best-ranked site does
+        ranked = sorted(range(len(self.sites)), key=lambda i: (self.sites[i].match_priority, i))
+        self._alias_rank = {}
+        for rank, i in enumerate(ranked):
+            for alias in self.sites[i].aliases:
+                self._alias_rank.setdefault(normalize_name(alias), (rank, self.sites[i]))
+        self._alias_pattern = (
+            re.compile(f'(?<![^_])(?=({_trie_regex(self._alias_rank)})(?![^_]))') if self._alias_rank else None
+        )
+
+        # Spatial grid: (lat cell, lng cell) -> sites
+        self._grid = {}
+        for site in self.sites:
+            self._grid.setdefault(self._cell(site.lat, site.lng), []).append(site)
+        if self._grid:
+            self._lat_cells = (min(cell[0] for cell in self._grid), max(cell[0] for cell in self._grid))
+            self._lng_cells = (min(cell[1] for cell in self._grid), max(cell[1] for cell in self._grid))
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        sites = [
+            Site(
+                entry['name'], float(entry['lat']), float(entry['lng']),
+                description=entry.get('description', ''),
+                aliases=entry.get('aliases', ()),
+                profile=entry.get('profile'),
+                match_priority=entry.get('match_priority', 0)
+            )
+            for entry in data['sites']
+        ]
+        return cls(sites, data.get('default_profile'), data.get('algal_bloom_profile'), **kwargs)
+
+    def __len__(self):
+        return len(self.sites)
+
+    def get(self, name):
+        """Return a site by exact or normalised name."""
+        return self._by_name.get(name) or self._by_normalized_name.get(normalize_name(name or ''))
+
+    def match_filename(self, filename):
+        """Return the highest-priority site with an alias in the filename, or None."""
+        if self._alias_pattern is None:
+            return None
+        found = [self._alias_rank[match.group(1)] for match in self._alias_pattern.finditer(normalize_name(filename))]
+        return min(found, key=lambda entry: entry[0])[1] if found else None
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    @staticmethod
+    def _ring_cells(center_lat, center_lng, ring):
+        """Yield the cells on the perimeter of the square `ring` cells from the center."""
+        if ring == 0:
+            yield (center_lat, center_lng)
+            return
+        for d in range(-ring, ring + 1):
+            yield (center_lat - ring, center_lng + d)
+            yield (center_lat + ring, center_lng + d)
+        for d in range(-ring + 1, ring):
+            yield (center_lat + d, center_lng - ring)
+            yield (center_lat + d, center_lng + ring)
+
+    def nearest(self, lat, lng, max_km=None):
+        """
+        Return (site, distance_km) for the site nearest to a position, or
+        (None, None) if no site lies within max_km.
+        """
+        if not self.sites:
+            return None, None
+        center_lat, center_lng = self._cell(lat, lng)
+        best_site, best_km = None, float('inf')
+        # Beyond this ring there are no occupied cells left
+        max_ring = max(
+            center_lat - self._lat_cells[0], self._lat_cells[1] - center_lat,
+            center_lng - self._lng_cells[0], self._lng_cells[1] - center_lng
+        )
+        ring = 0
+        while ring <= max_ring:
+            # Any site in this ring is at least (ring - 1) cells away; longitude
+            # degrees shrink towards the poles, so bound with the ring's highest latitude
+            edge_lat = min(89.0, abs(lat) + (ring + 1) * self.cell_degrees)
+            lower_bound_km = max(0, ring - 1) * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+            if lower_bound_km > best_km or (max_km is not None and lower_bound_km > max_km):
+                break
+            for cell in self._ring_cells(center_lat, center_lng, ring):
+                for site in self._grid.get(cell, ()):
+                    distance = haversine_km(lat, lng, site.lat, site.lng)
+                    if distance < best_km:
+                        best_site, best_km = site, distance
+            ring += 1
+        if best_site is None or (max_km is not None and best_km > max_km):
+            return None, None
+        return best_site, best_km
+
+    def profile_for(self, site, filename=''):
+        """Metric ranges used to simulate an assessment at a site."""
+        if site is not None and site.profile:
+            return site.profile
+        profile = dict(self.default_profile)
+        if 'algal_bloom' in filename.lower():
+            profile.update(self.algal_bloom_profile)
+        return profile
@@ -47,6 +47,10 @@ class ReefAssessmentApp {
                 this.updateLocationMap(data.results);
                 this.enableChatbot();
             }
+            // Any completed analysis adds a survey point to the map
+            if (this.surveyLayer) {
+                this.loadSurveyClusters();
+            }
         });
         
         this.socket.on('disconnect', () => {
@@ -43,6 +43,9 @@ ReefAssessmentApp.prototype.initializeMap = function() {
     
     // Add markers to the map
     this.addLeafletMarkers();
+    
+    // Overlay clustered survey points aggregated by the server
+    this.initSurveyClusters();
 };
 
 ReefAssessmentApp.prototype.initLeafletMap = function() {
@@ -94,6 +97,50 @@ ReefAssessmentApp.prototype.addLeafletMarkers = function() {
     });
 };
 
+ReefAssessmentApp.prototype.initSurveyClusters = function() {
+    // Clusters are recomputed server-side per view, so only the visible aggregates are sent
+    this.surveyLayer = L.layerGroup().addTo(this.map);
+    this.map.on('moveend', () => this.loadSurveyClusters());
+    this.loadSurveyClusters();
+};
+
+ReefAssessmentApp.prototype.loadSurveyClusters = function() {
+    const bounds = this.map.getBounds();
+    const bbox = [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()]
+        .map(value => value.toFixed(5))
+        .join(',');
+    
+    fetch(`/map/points?bbox=${bbox}&zoom=${this.map.getZoom()}`)
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data) return;
+            this.surveyLayer.clearLayers();
+            data.clusters.forEach(cluster => this.addSurveyCluster(cluster));
+        })
+        .catch(error => console.error('Failed to load survey clusters:', error));
+};
+
+ReefAssessmentApp.prototype.addSurveyCluster = function(cluster) {
+    // Colour by mean Fish Health Index, using the report's status thresholds
+    let color = '#95a5a6';
+    if (cluster.mean_fhi !== null) {
+        color = cluster.mean_fhi < 0.4 ? '#e74c3c' : (cluster.mean_fhi < 0.7 ? '#f39c12' : '#2ecc71');
+    }
+    const radius = 6 + Math.min(18, Math.log2(cluster.count) * 2);
+    const fhiText = cluster.mean_fhi !== null ? cluster.mean_fhi.toFixed(2) : 'n/a';
+    const label = cluster.count === 1
+        ? `<b>Survey ${cluster.session_id}</b><br>FHI: ${fhiText}`
+        : `<b>${cluster.count} surveys</b><br>Mean FHI: ${fhiText}`;
+    
+    L.circleMarker([cluster.lat, cluster.lng], {
+        radius: radius,
+        color: color,
+        fillColor: color,
+        fillOpacity: 0.6,
+        weight: 1
+    }).addTo(this.surveyLayer).bindPopup(label);
+};
+
 ReefAssessmentApp.prototype.createMapMarkers = function() {
     const markersGroup = document.getElementById('location-markers');
     
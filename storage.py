@@ -0,0 +1,293 @@
+"""
+Upload storage lifecycle management.
+
+Raw dive videos are large and the deployment disk is small (1 GB on Render),
+so uploads are tracked and evicted once they are no longer needed:
+
+- every file in the upload folder is indexed with its size, upload time and
+  last access; the index survives restarts in a small manifest file;
+- a configurable quota is enforced before an upload is accepted, evicting
+  raw videos (least recently used, or oldest first) whose analysis results
+  are already persisted, then proxies in the same order once no raw video
+  is left to evict; videos still being analysed are never evicted;
+- optionally a downscaled proxy is written once the results are persisted,
+  so something viewable remains after the raw video is evicted (requires
+  ffmpeg on the PATH);
+- uploads that cannot fit even after eviction are refused before the
+  request body is streamed to disk.
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '.storage_index.json'
+PROXY_SUFFIX = '.proxy.mp4'
+EVICTION_POLICIES = ('lru', 'age')
+
+
+class UploadStorage:
+    """
+    Track uploaded files and keep the upload folder within a disk quota.
+
+    Args:
+        folder (str): Upload folder
+        quota_bytes (int): Maximum bytes used by uploads (0 disables the quota)
+        policy (str): 'lru' (least recently accessed first) or 'age' (oldest upload first)
+        max_age_seconds (float): Evict analysed raw videos older than this regardless
+            of quota (None disables age expiry)
+        is_persisted (callable): session_id -> bool, True once results are stored durably
+        keep_proxy (bool): Keep a downscaled proxy of each analysed raw video
+        proxy_height (int): Height in pixels of the proxy video
+        min_free_bytes (int): Free disk space to always leave on the volume
+    """
+
+    def __init__(self, folder, quota_bytes=0, policy='lru', max_age_seconds=None,
+                 is_persisted=None, keep_proxy=False, proxy_height=360,
+                 min_free_bytes=50 * 1024 * 1024):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{policy}'. Use one of: {', '.join(EVICTION_POLICIES)}")
+        self.folder = folder
+        self.quota_bytes = quota_bytes
+        self.policy = policy
+        self.max_age_seconds = max_age_seconds
+        self.is_persisted = is_persisted or (lambda session_id: False)
+        self.keep_proxy = keep_proxy and shutil.which('ffmpeg') is not None
+        self.proxy_height = proxy_height
+        self.min_free_bytes = min_free_bytes
+        self._files = {}
+        self._reserved = 0
+        self._lock = threading.RLock()
+        if keep_proxy and not self.keep_proxy:
+            logger.warning("Proxy videos requested but ffmpeg was not found; raw videos will be evicted without a proxy")
+        os.makedirs(folder, exist_ok=True)
+        self.scan()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _manifest_path(self):
+        return os.path.join(self.folder, MANIFEST_NAME)
+
+    def scan(self):
+        """Rebuild the index from disk, keeping access times from the manifest."""
+        known = {}
+        try:
+            with open(self._manifest_path()) as f:
+                known = json.load(f)
+        except (OSError, ValueError):
+            pass
+        files = {}
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if not entry.is_file() or entry.name.startswith('.'):
+                    continue
+                stat = entry.stat()
+                previous = known.get(entry.name, {})
+                files[entry.name] = {
+                    'size': stat.st_size,
+                    'session_id': previous.get('session_id', entry.name.split('_', 1)[0]),
+                    'uploaded': previous.get('uploaded', stat.st_mtime),
+                    'last_access': previous.get('last_access', stat.st_mtime),
+                    'proxy': entry.name.endswith(PROXY_SUFFIX),
+                }
+        with self._lock:
+            self._files = files
+        self._save_manifest()
+
+    def _save_manifest(self):
+        with self._lock:
+            snapshot = json.dumps(self._files)
+        tmp_path = self._manifest_path() + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self._manifest_path())
+        except OSError as e:
+            logger.error(f"Could not write storage manifest: {e}")
+
+    def register(self, filename, session_id):
+        """Record a newly saved upload."""
+        path = os.path.join(self.folder, filename)
+        now = time.time()
+        with self._lock:
+            self._files[filename] = {
+                'size': os.path.getsize(path),
+                'session_id': session_id,
+                'uploaded': now,
+                'last_access': now,
+                'proxy': False,
+            }
+        self._save_manifest()
+
+    def touch(self, filename):
+        """Mark a file as accessed (for LRU eviction)."""
+        with self._lock:
+            if filename not in self._files:
+                return
+            self._files[filename]['last_access'] = time.time()
+        self._save_manifest()
+
+    def touch_session(self, session_id):
+        """Mark a session's raw video and proxy as accessed."""
+        now = time.time()
+        with self._lock:
+            touched = [info for info in self._files.values() if info['session_id'] == session_id]
+            for info in touched:
+                info['last_access'] = now
+        if touched:
+            self._save_manifest()
+
+    def used_bytes(self):
+        with self._lock:
+            return sum(info['size'] for info in self._files.values())
+
+    # ------------------------------------------------------------------
+    # Quota and eviction
+    # ------------------------------------------------------------------
+    def _available_bytes(self):
+        """Bytes that may still be written without breaking the quota or filling the disk."""
+        free_on_disk = shutil.disk_usage(self.folder).free - self.min_free_bytes
+        with self._lock:
+            available = free_on_disk - self._reserved
+            if self.quota_bytes:
+                available = min(available, self.quota_bytes - self.used_bytes() - self._reserved)
+        return available
+
+    def _eviction_candidates(self, include_proxies=True):
+        """
+        Files whose results are persisted, in eviction order: raw videos
+        first, then (unless include_proxies is False) proxies, each by policy.
+        """
+        sort_key = 'last_access' if self.policy == 'lru' else 'uploaded'
+        with self._lock:
+            candidates = [
+                (info['proxy'], info[sort_key], filename, info) for filename, info in self._files.items()
+                if (include_proxies or not info['proxy']) and self.is_persisted(info['session_id'])
+            ]
+        candidates.sort(key=lambda item: item[:2])
+        return [(filename, info) for _, _, filename, info in candidates]
+
+    def _evict(self, filename, info):
+        path = os.path.join(self.folder, filename)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._files.pop(filename, None)
+        kind = 'proxy video' if info['proxy'] else 'raw video'
+        logger.info(f"Evicted {kind} {filename} ({info['size'] / 1048576:.1f} MB, session {info['session_id']})")
+        return info['size']
+
+    def create_proxy(self, session_id):
+        """
+        Write a downscaled proxy for a session's raw video (no-op unless
+        keep_proxy is enabled and ffmpeg is available).
+
+        Called once the analysis results are persisted, so the raw video can
+        later be evicted without waiting for a transcode.
+        """
+        if not self.keep_proxy:
+            return None
+        with self._lock:
+            raw_files = [name for name, info in self._files.items()
+                         if info['session_id'] == session_id and not info['proxy']]
+        for filename in raw_files:
+            return self._make_proxy(os.path.join(self.folder, filename))
+        return None
+
+    def _make_proxy(self, path):
+        proxy_path = os.path.splitext(path)[0] + PROXY_SUFFIX
+        self.touch(os.path.basename(path))
+        command = [
+            'ffmpeg', '-y', '-loglevel', 'error', '-i', path,
+            '-vf', f"scale=-2:{self.proxy_height}", '-c:v', 'libx264', '-crf', '30',
+            '-preset', 'veryfast', '-an', proxy_path
+        ]
+        try:
+            subprocess.run(command, check=True, timeout=600)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(f"Proxy generation failed for {path}: {e}")
+            return None
+        filename = os.path.basename(proxy_path)
+        with self._lock:
+            self._files[filename] = {
+                'size': os.path.getsize(proxy_path),
+                'session_id': filename.split('_', 1)[0],
+                'uploaded': time.time(),
+                'last_access': time.time(),
+                'proxy': True,
+            }
+        self._save_manifest()
+        return filename
+
+    def expire(self):
+        """Evict analysed raw videos older than max_age_seconds (proxies are kept)."""
+        if not self.max_age_seconds:
+            return 0
+        cutoff = time.time() - self.max_age_seconds
+        freed = 0
+        for filename, info in self._eviction_candidates(include_proxies=False):
+            if info['uploaded'] < cutoff:
+                freed += self._evict(filename, info)
+        if freed:
+            self._save_manifest()
+        return freed
+
+    def make_room(self, needed_bytes):
+        """Evict until needed_bytes fit; return True if they do."""
+        self.expire()
+        if self._available_bytes() >= needed_bytes:
+            return True
+        evicted = False
+        for filename, info in self._eviction_candidates():
+            self._evict(filename, info)
+            evicted = True
+            if self._available_bytes() >= needed_bytes:
+                break
+        if evicted:
+            self._save_manifest()
+        return self._available_bytes() >= needed_bytes
+
+    def reserve(self, nbytes):
+        """
+        Reserve space for an incoming upload, evicting if needed.
+
+        Returns True if the upload fits; the caller must release() the
+        reservation once the file is saved (or the upload failed).
+        """
+        with self._lock:
+            if not self.make_room(nbytes):
+                return False
+            self._reserved += nbytes
+            return True
+
+    def release(self, nbytes):
+        with self._lock:
+            self._reserved = max(0, self._reserved - nbytes)
+
+    def stats(self):
+        """Return usage figures for monitoring."""
+        with self._lock:
+            raw = [info for info in self._files.values() if not info['proxy']]
+            proxies = [info for info in self._files.values() if info['proxy']]
+            reserved = self._reserved
+        disk = shutil.disk_usage(self.folder)
+        return {
+            'policy': self.policy,
+            'quota_bytes': self.quota_bytes,
+            'used_bytes': sum(info['size'] for info in raw + proxies),
+            'reserved_bytes': reserved,
+            'raw_videos': len(raw),
+            'proxies': len(proxies),
+            'evictable_videos': len(self._eviction_candidates()),
+            'disk_free_bytes': disk.free,
+            'available_bytes': max(0, self._available_bytes()),
+        }
@@ -0,0 +1,23 @@
+import os
+import zipfile
+
+from campaigns import Campaign, zip_items
+
+
+def test_on_finish_runs_after_the_archive_is_removed(tmp_path):
+    archive_path = str(tmp_path / 'campaign.zip')
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.writestr('la_paz_dive.mp4', b'video')
+    finished = []
+
+    def process(campaign, item):
+        destination = campaign.extract(item, str(tmp_path / item['name']))
+        assert os.path.getsize(destination) == 5
+        return {'session_id': 'abcd1234', 'location': 'La Paz', 'fish_health_index': 0.5}
+
+    campaign = Campaign('c1', zip_items(archive_path), process, archive_path=archive_path, remove_archive=True,
+                        on_finish=lambda: finished.append(os.path.exists(archive_path)))
+    summary = campaign.run()
+
+    assert len(summary['sessions']) == 1 and not summary['failures']
+    assert finished == [False]
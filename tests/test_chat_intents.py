@@ -0,0 +1,74 @@
+import pytest
+
+from chat_intents import ChatContext, build_router
+
+BASELINE = {
+    "fish_health_index": 0.85,
+    "fish_density": 280,
+    "invertebrate_cover": 65,
+    "coral_bleaching": 5,
+    "invasive_species": 0
+}
+
+RESULTS = {
+    'location': 'La Paz',
+    'fish_health_index': 0.41,
+    'fish_density': 190,
+    'invertebrate_cover': 38,
+    'coral_bleaching': 12,
+    'invasive_species': 0,
+    'algal_bloom_level': 'Low',
+    'algal_bloom_score': 0.15,
+}
+
+
+def route(query):
+    router = build_router()
+    return router.route(ChatContext(query.lower(), RESULTS, BASELINE))
+
+
+@pytest.mark.parametrize('query, intent', [
+    ("What are the latest fish trends here?", 'fish_trend'),
+    ("How does temperature correlate with fish biomass in this area?", 'temperature'),
+    ("Compare this site to the Cabo Pulmo baseline", 'baseline_comparison'),
+    ("how much coral bleching is there?", 'bleaching'),
+    ("which site is healthiest?", 'site_ranking'),
+    ("hello", 'help'),
+    ("what is the baseline?", 'baseline_comparison'),
+    ("tell me about cabo pulmo", 'baseline_comparison'),
+    ("what is the fhi of this site?", 'health_summary'),
+    ("were any lionfish found here?", 'invasive_species'),
+])
+def test_quick_prompts_are_answered_locally(query, intent):
+    matched, response = route(query)
+    assert matched == intent
+    assert response
+
+
+@pytest.mark.parametrize('query', [
+    "how can marine protected areas help fish recover?",
+    "what is the status of vaquita conservation?",
+    "show me the results of the 2019 census",
+    "compare la paz and loreto",
+    "what climate policies does mexico have?",
+    "is ocean warming affecting whale migration?",
+    "what is the water temperature in winter?",
+    "what does the fhi mean and how is it computed?",
+    "explain red tide ecology in general",
+    "why do corals get bleached?",
+    "what are invertebrates?",
+    "are lionfish invasive in the gulf?",
+])
+def test_general_questions_fall_through_to_openai(query):
+    assert route(query) == (None, None)
+
+
+def test_stats_count_fallbacks():
+    router = build_router()
+    router.route(ChatContext("what are the latest fish trends here?", RESULTS, BASELINE))
+    router.route(ChatContext("what climate policies does mexico have?", RESULTS, BASELINE))
+    stats = router.stats()
+    assert stats['queries'] == 2
+    assert stats['intents']['fish_trend']['hits'] == 1
+    assert stats['intents']['fallback']['hits'] == 1
+    assert stats['answered_locally'] == 0.5
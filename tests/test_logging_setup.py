@@ -0,0 +1,31 @@
+import logging
+
+from logging_setup import SamplingFilter
+
+
+def record(sample=None, level=logging.INFO):
+    rec = logging.LogRecord('test', level, __file__, 1, 'message', None, None)
+    if sample is not None:
+        rec.sample = sample
+    return rec
+
+
+def kept(sampling_filter, sample, n, level=logging.INFO):
+    return [sampling_filter.filter(record(sample, level)) for _ in range(n)]
+
+
+def test_no_sampling_by_default():
+    assert all(kept(SamplingFilter(), 'access', 5))
+
+
+def test_first_record_of_each_window_is_kept():
+    sampling_filter = SamplingFilter({'access': 3})
+    assert kept(sampling_filter, 'access', 7) == [True, False, False, True, False, False, True]
+    # Other keys use the default rate
+    assert all(kept(sampling_filter, 'analysis_results', 3))
+
+
+def test_untagged_and_warning_records_are_always_kept():
+    sampling_filter = SamplingFilter(default_rate=10)
+    assert all(kept(sampling_filter, None, 5))
+    assert all(kept(sampling_filter, 'access', 5, level=logging.WARNING))
@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from map_index import SurveyPointIndex
+
+
+def test_world_view_at_max_zoom_is_rejected_before_enumerating_tiles():
+    index = SurveyPointIndex(max_zoom=14)
+    index.add(24.1426, -110.3128, 0.6, 'abcd1234')
+
+    started = time.perf_counter()
+    with pytest.raises(ValueError, match='tiles at zoom 14'):
+        index.query(-180, -85, 180, 85, 14)
+    assert time.perf_counter() - started < 0.1
+
+
+def test_view_across_the_antimeridian_counts_both_ranges():
+    index = SurveyPointIndex(max_zoom=14)
+    index.add(24.1426, -110.3128, 0.6, 'abcd1234')
+
+    view = index.query(170, -10, -170, 10, 4)
+
+    assert view['tiles'] == 2 * 2
+    assert view['points'] == 0
+    assert index.query(-115, 20, -105, 30, 4)['points'] == 1
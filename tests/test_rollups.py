@@ -0,0 +1,43 @@
+import json
+
+from rollups import SiteRollups
+from session_store import SessionStore
+
+
+def results(session_id, fhi, day):
+    return {
+        'session_id': session_id,
+        'location': 'La Paz',
+        'date': f'2025-03-{day:02d}',
+        'fish_health_index': fhi,
+        'fish_density': 200,
+        'invertebrate_cover': 40,
+        'coral_bleaching': 10,
+    }
+
+
+def test_snapshot_is_written_in_batches(tmp_path):
+    path = tmp_path / 'rollups.json'
+    rollups = SiteRollups(str(path), max_pending=3)
+    rollups.add_results(results('a1', 0.5, 1))
+    rollups.add_results(results('a2', 0.6, 2))
+    assert not path.exists()
+    assert rollups.flush()
+    assert not rollups.flush()  # nothing new since the last write
+    assert sorted(json.load(open(path))['session_ids']) == ['a1', 'a2']
+
+
+def test_sessions_missing_from_the_snapshot_are_folded_in_on_load(tmp_path):
+    store = SessionStore(str(tmp_path / 'results'))
+    path = str(tmp_path / 'rollups.json')
+    rollups = SiteRollups(path)
+    for index, fhi in enumerate((0.4, 0.5, 0.6), start=1):
+        store.save(f's{index}', results(f's{index}', fhi, index))
+        rollups.add_results(results(f's{index}', fhi, index))
+        if index == 1:
+            rollups.flush()
+    # Simulate a crash: only the first session reached the snapshot
+    reloaded = SiteRollups.load(path, store)
+    summary = reloaded.summary('La Paz')
+    assert summary['sessions'] == 3
+    assert summary['metrics']['fish_health_index']['mean'] == rollups.summary('La Paz')['metrics']['fish_health_index']['mean']
@@ -0,0 +1,47 @@
+import os
+import time
+
+from sites import Site, SiteRegistry
+
+SITES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'sites.json')
+
+
+def test_filename_with_several_sites_keeps_the_original_priority():
+    registry = SiteRegistry.from_file(SITES_FILE)
+
+    assert registry.match_filename('loreto_vs_la_paz.mp4').name == 'La Paz'
+    assert registry.match_filename('Cabo Pulmo vs Loreto.mp4').name == 'Loreto'
+    assert registry.match_filename('cabopulmo_corredor.mp4').name == 'Corredor'
+    assert registry.match_filename('corredor_loreto.mp4').name == 'Loreto'
+    assert registry.match_filename('open_water.mp4') is None
+
+
+def test_longest_alias_at_a_position_wins_over_its_prefixes():
+    registry = SiteRegistry([
+        Site('Bay', 0, 0, aliases=['bay']),
+        Site('Bay Point', 1, 1, aliases=['bay_point']),
+    ])
+
+    assert registry.match_filename('bay_point_dive.mp4').name == 'Bay Point'
+    assert registry.match_filename('point_bay.mp4').name == 'Bay'
+    assert registry.match_filename('baywatch.mp4') is None
+
+
+def test_numbered_sites_match_whole_tokens_only():
+    registry = SiteRegistry([Site(f'Site {i}', 0, 0, aliases=[f'site_{i}']) for i in range(1, 200)])
+
+    assert registry.match_filename('dive_site_123_x.mp4').name == 'Site 123'
+    assert registry.match_filename('Site 12.mp4').name == 'Site 12'
+    assert registry.match_filename('site_1234.mp4') is None
+
+
+def test_registry_with_thousands_of_sites_builds_and_matches_quickly():
+    started = time.perf_counter()
+    registry = SiteRegistry([
+        Site(f'Site {i}', i % 170 - 85, i % 360 - 180, aliases=[f'site_{i}', f'site{i}'])
+        for i in range(1, 5001)
+    ])
+
+    assert registry.match_filename('survey_site4999_dive.mp4').name == 'Site 4999'
+    assert registry.nearest(0.1, 5.1)[0] is not None
+    assert time.perf_counter() - started < 1.0
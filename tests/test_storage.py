@@ -0,0 +1,75 @@
+import os
+
+import storage
+from storage import PROXY_SUFFIX, UploadStorage
+
+MB = 1024 * 1024
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def write(folder, name, size):
+    with open(os.path.join(folder, name), 'wb') as f:
+        f.write(b'\0' * size)
+
+
+def make_storage(folder, monkeypatch, quota_bytes, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(storage.time, 'time', clock)
+    uploads = UploadStorage(str(folder), quota_bytes=quota_bytes, is_persisted=lambda session_id: True,
+                            min_free_bytes=0, **kwargs)
+    return uploads, clock
+
+
+def test_touched_video_outlives_older_untouched_one(tmp_path, monkeypatch):
+    uploads, clock = make_storage(tmp_path, monkeypatch, quota_bytes=3 * MB, policy='lru')
+    write(tmp_path, 'aaaa_old.mp4', MB)
+    uploads.register('aaaa_old.mp4', 'aaaa')
+    clock.now += 10
+    write(tmp_path, 'bbbb_new.mp4', MB)
+    uploads.register('bbbb_new.mp4', 'bbbb')
+    clock.now += 10
+    uploads.touch_session('aaaa')
+
+    assert uploads.reserve(2 * MB)
+    assert os.path.exists(tmp_path / 'aaaa_old.mp4')
+    assert not os.path.exists(tmp_path / 'bbbb_new.mp4')
+
+
+def test_age_policy_ignores_access(tmp_path, monkeypatch):
+    uploads, clock = make_storage(tmp_path, monkeypatch, quota_bytes=3 * MB, policy='age')
+    write(tmp_path, 'aaaa_old.mp4', MB)
+    uploads.register('aaaa_old.mp4', 'aaaa')
+    clock.now += 10
+    write(tmp_path, 'bbbb_new.mp4', MB)
+    uploads.register('bbbb_new.mp4', 'bbbb')
+    clock.now += 10
+    uploads.touch('aaaa_old.mp4')
+
+    assert uploads.reserve(2 * MB)
+    assert not os.path.exists(tmp_path / 'aaaa_old.mp4')
+    assert os.path.exists(tmp_path / 'bbbb_new.mp4')
+
+
+def test_proxies_are_evicted_after_raw_videos(tmp_path, monkeypatch):
+    write(tmp_path, 'aaaa_one' + PROXY_SUFFIX, MB)
+    write(tmp_path, 'bbbb_two' + PROXY_SUFFIX, MB)
+    uploads, clock = make_storage(tmp_path, monkeypatch, quota_bytes=3 * MB)
+    write(tmp_path, 'cccc_raw.mp4', MB)
+    uploads.register('cccc_raw.mp4', 'cccc')
+
+    # Freeing the raw video is enough
+    assert uploads.reserve(MB)
+    assert not os.path.exists(tmp_path / 'cccc_raw.mp4')
+    assert len(os.listdir(tmp_path)) == 3  # two proxies and the manifest
+    uploads.release(MB)
+
+    # Only proxies are left, so they go next rather than refusing the upload
+    assert uploads.reserve(2 * MB)
+    assert uploads.stats()['proxies'] == 1